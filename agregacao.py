@@ -0,0 +1,236 @@
+# agregacao.py
+"""Cache de agregação incremental dos resultados por organização.
+
+Em vez de baixar a aba inteira e recalcular tudo a cada consulta, o agregador
+guarda a última linha já consumida e lê só as linhas novas, em intervalos
+(`get_values("A{ini}:I{fim}")`). Para cada (id_organizacao, bloco, item) mantém
+soma e contagem das pontuações num cache SQLite local, e em memória os totais
+por organização e por bloco, de modo que as consultas do painel custam O(1).
+A planilha só é relida quando o cache passa do TTL. No formato largo, linhas
+que não podem ser convertidas (versão desconhecida) são puladas e contadas em
+`estado()["linhas_ignoradas"]`, sem travar o cursor.
+"""
+import sqlite3
+import threading
+import time
+
+from formato import larga_para_longa, letra_coluna
+
+# Posições das colunas no formato longo
+COL_ID_ORG, COL_BLOCO, COL_ITEM, COL_PONTUACAO = 1, 5, 6, 8
+
+
+class AgregadorIncremental:
+    """Somas e contagens por organização/bloco/item, atualizadas incrementalmente."""
+
+    def __init__(
+        self,
+        planilha,
+        itens,
+        caminho_cache="agregados.sqlite3",
+        ttl=300.0,
+        linhas_por_leitura=5000,
+        formato="longo",
+        itens_por_versao=None,
+    ):
+        self.planilha = planilha
+        self.ttl = ttl
+        self.linhas_por_leitura = linhas_por_leitura
+        self.formato = formato
+        self.itens_por_versao = itens_por_versao or {}
+        # O formato longo grava o texto do item; as consultas usam o ID
+        self._id_por_texto = {texto: item_id for _, item_id, texto, _ in itens}
+
+        self._lock = threading.RLock()
+        self._ultima_atualizacao = 0.0
+        self._cabecalho = None
+        self.linhas_ignoradas = 0
+
+        self._conn = sqlite3.connect(caminho_cache, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cursor (
+                aba TEXT PRIMARY KEY,
+                ultima_linha INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS somas (
+                aba TEXT NOT NULL,
+                id_organizacao TEXT NOT NULL,
+                bloco TEXT NOT NULL,
+                item TEXT NOT NULL,
+                soma REAL NOT NULL,
+                contagem INTEGER NOT NULL,
+                PRIMARY KEY (aba, id_organizacao, bloco, item)
+            );
+            """
+        )
+        linha = self._conn.execute(
+            "SELECT ultima_linha FROM cursor WHERE aba = ?", (self._nome_aba(),)
+        ).fetchone()
+        if linha:
+            self.ultima_linha = linha[0]
+        else:
+            # No formato largo a linha 1 é sempre o cabeçalho; no longo, um eventual
+            # cabeçalho é descartado na leitura (a pontuação não é numérica)
+            self.ultima_linha = 1 if formato == "largo" else 0
+
+        # Totais em memória: (org, bloco, item), (org, bloco) e (org,) → [soma, contagem]
+        self._por_item = {}
+        self._por_bloco = {}
+        self._por_org = {}
+        for org, bloco, item, soma, contagem in self._conn.execute(
+            "SELECT id_organizacao, bloco, item, soma, contagem FROM somas WHERE aba = ?", (self._nome_aba(),)
+        ):
+            self._acumular(org, bloco, item, soma, contagem)
+
+    def _nome_aba(self):
+        return getattr(self.planilha, "title", "Likert")
+
+    def _acumular(self, org, bloco, item, soma, contagem):
+        for chave, destino in (((org, bloco, item), self._por_item), ((org, bloco), self._por_bloco), ((org,), self._por_org)):
+            total = destino.setdefault(chave, [0.0, 0])
+            total[0] += soma
+            total[1] += contagem
+
+    # --- LEITURA INCREMENTAL ---
+    def _ler_intervalo(self, inicio, fim):
+        if self.formato == "largo":
+            if self._cabecalho is None:
+                self._cabecalho = self.planilha.row_values(1)
+            ultima_coluna = letra_coluna(len(self._cabecalho))
+            linhas = self.planilha.get_values(f"A{inicio}:{ultima_coluna}{fim}")
+            ignoradas = []
+            longas = larga_para_longa(linhas, self.itens_por_versao, self._cabecalho, ignoradas)
+            if ignoradas:
+                self.linhas_ignoradas += len(ignoradas)
+                print(f"Agregação: {len(ignoradas)} linhas ignoradas entre {inicio} e {fim} ({ignoradas[0][1]}).")
+            return linhas, longas
+        linhas = self.planilha.get_values(f"A{inicio}:I{fim}")
+        return linhas, linhas
+
+    def atualizar(self, forcar=False):
+        """Consome as linhas novas da planilha, se o TTL venceu (ou se `forcar`).
+
+        Retorna o número de linhas novas consumidas.
+        """
+        with self._lock:
+            if not forcar and time.monotonic() - self._ultima_atualizacao < self.ttl:
+                return 0
+
+            consumidas = 0
+            while True:
+                inicio = self.ultima_linha + 1
+                fim = inicio + self.linhas_por_leitura - 1
+                brutas, longas = self._ler_intervalo(inicio, fim)
+                if not brutas:
+                    break
+
+                novos = {}
+                for linha in longas:
+                    if len(linha) <= COL_PONTUACAO:
+                        continue
+                    try:
+                        pontuacao = float(linha[COL_PONTUACAO])
+                    except (TypeError, ValueError):
+                        continue  # N/A ou cabeçalho
+                    item = self._id_por_texto.get(linha[COL_ITEM], linha[COL_ITEM])
+                    chave = (linha[COL_ID_ORG], linha[COL_BLOCO], item)
+                    total = novos.setdefault(chave, [0.0, 0])
+                    total[0] += pontuacao
+                    total[1] += 1
+
+                # Cursor e somas gravados na mesma transação: nada é contado duas vezes
+                self.ultima_linha += len(brutas)
+                with self._conn:
+                    self._conn.executemany(
+                        """INSERT INTO somas (aba, id_organizacao, bloco, item, soma, contagem)
+                           VALUES (?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (aba, id_organizacao, bloco, item) DO UPDATE SET
+                               soma = soma + excluded.soma,
+                               contagem = contagem + excluded.contagem""",
+                        [(self._nome_aba(), org, bloco, item, s, c) for (org, bloco, item), (s, c) in novos.items()],
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO cursor (aba, ultima_linha) VALUES (?, ?)",
+                        (self._nome_aba(), self.ultima_linha),
+                    )
+                for (org, bloco, item), (s, c) in novos.items():
+                    self._acumular(org, bloco, item, s, c)
+
+                consumidas += len(brutas)
+                if len(brutas) < self.linhas_por_leitura:
+                    break
+
+            self._ultima_atualizacao = time.monotonic()
+            return consumidas
+
+    # --- CONSULTAS (O(1) APÓS A ATUALIZAÇÃO) ---
+    def media(self, id_organizacao, bloco=None, item=None):
+        """Média e número de respostas válidas da organização, do bloco ou do item.
+
+        Retorna {"media": float | None, "n": int}.
+        """
+        self.atualizar()
+        with self._lock:
+            if item is not None:
+                total = self._por_item.get((id_organizacao, bloco, item))
+            elif bloco is not None:
+                total = self._por_bloco.get((id_organizacao, bloco))
+            else:
+                total = self._por_org.get((id_organizacao,))
+        if not total or not total[1]:
+            return {"media": None, "n": 0}
+        return {"media": total[0] / total[1], "n": total[1]}
+
+    def organizacoes(self):
+        self.atualizar()
+        with self._lock:
+            return sorted(org for (org,) in self._por_org)
+
+    def resumo_organizacao(self, id_organizacao, blocos):
+        """Média por bloco de uma organização, para os blocos informados."""
+        return {bloco: self.media(id_organizacao, bloco) for bloco in blocos}
+
+    def estado(self):
+        with self._lock:
+            return {
+                "ultima_linha": self.ultima_linha,
+                "idade_cache_s": time.monotonic() - self._ultima_atualizacao if self._ultima_atualizacao else None,
+                "chaves_item": len(self._por_item),
+                "organizacoes": len(self._por_org),
+                "linhas_ignoradas": self.linhas_ignoradas,
+            }
+
+
+def main():
+    import argparse
+
+    from itens import ITENS, itens_por_versao
+
+    parser = argparse.ArgumentParser(description="Médias por organização e bloco, lidas incrementalmente da planilha.")
+    parser.add_argument("--credenciais", required=True, help="JSON da service account do Google")
+    parser.add_argument("--planilha", default="Respostas Formularios")
+    parser.add_argument("--aba", default="Likert")
+    parser.add_argument("--formato", choices=("longo", "largo"), default="longo")
+    parser.add_argument("--cache", default="agregados.sqlite3")
+    args = parser.parse_args()
+
+    import gspread
+
+    ws = gspread.service_account(filename=args.credenciais).open(args.planilha).worksheet(args.aba)
+    agregador = AgregadorIncremental(
+        ws, ITENS, caminho_cache=args.cache, formato=args.formato,
+        itens_por_versao=itens_por_versao(),
+    )
+    novas = agregador.atualizar(forcar=True)
+    print(f"{novas} linhas novas consumidas (última linha: {agregador.ultima_linha}).")
+    blocos = list(dict.fromkeys(bloco for bloco, _, _, _ in ITENS))
+    for org in agregador.organizacoes():
+        medias = agregador.resumo_organizacao(org, blocos)
+        partes = [f"{b}: {m['media']:.2f} (n={m['n']})" for b, m in medias.items() if m["n"]]
+        print(f"{org}  " + " | ".join(partes))
+
+
+if __name__ == "__main__":
+    main()
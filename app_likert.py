@@ -1,13 +1,29 @@
 # app_likert_final.py
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import gspread
-import matplotlib.pyplot as plt
-import urllib.parse
-import hmac
 import hashlib
+from urllib.parse import urlencode
+import os
+import time
+import metricas
+from armazenamento import ArmazenamentoPlanilha, ArmazenamentoSQLite, EspelhoPlanilha, aba_respostas
+from fila_envio import FilaEnvio
+from conexao import ConexaoPlanilha
+from formato import FORMATOS, cabecalho_largo
+from itens import INSTRUMENTO_PADRAO, carregar_instrumento, listar_instrumentos
+from links import ResultadoLink, verificar as verificar_link
+from relatorio import FORMATOS_RELATORIO, GeradorRelatorios, perfil_de
+from rascunhos import ArmazemRascunhos, VetorRespostas, novo_token, token_valido
 
+# --- INSTRUMENTAÇÃO DA EXECUÇÃO ---
+inicio_execucao = time.perf_counter()
+st.session_state.reruns = st.session_state.get("reruns", 0) + 1  # Reexecuções desta sessão
+metricas.incrementar("likert_reruns_total")
+
+def encerrar_execucao(resultado):
+    """Registra a duração desta execução do script e a encerra (substitui st.stop())."""
+    metricas.observar("likert_rerun_segundos", time.perf_counter() - inicio_execucao, resultado=resultado)
+    st.stop()
 
 # --- PALETA DE CORES E CONFIGURAÇÃO DA PÁGINA ---
 COLOR_PRIMARY = "#70D1C6"
@@ -27,11 +43,6 @@ st.markdown(f"""
             visibility: hidden; height: 0%; position: fixed;
         }}
         
-        /* Código que esconde o botão ping */
-        #autoclick-div {{
-            display: none !important; 
-        }}
-        
         footer {{ visibility: hidden; height: 0%; }}
         /* Estilos gerais */
         .stApp {{ background-color: {COLOR_BACKGROUND}; color: {COLOR_TEXT_DARK}; }}
@@ -91,40 +102,195 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
+def ler_config(chave, padrao=None):
+    """Lê uma opção de st.secrets, devolvendo `padrao` se ela (ou o arquivo de secrets) não existir."""
+    try:
+        return st.secrets.get(chave, padrao)
+    except FileNotFoundError:
+        return padrao
+
+# --- EXPORTAÇÃO DAS MÉTRICAS (UMA VEZ POR PROCESSO) ---
+@st.cache_resource
+def iniciar_metricas():
+    """Resumo periódico no log e, se configurados, arquivo .prom e endpoint /metrics."""
+    metricas.iniciar_exportacao(
+        intervalo=float(ler_config("metricas_intervalo", 60)),
+        arquivo=ler_config("metricas_arquivo"),
+    )
+    porta = ler_config("metricas_porta")
+    if porta:
+        metricas.iniciar_servidor_http(int(porta))
+    return True
+
+iniciar_metricas()
+
+# --- LÓGICA DO QUESTIONÁRIO (BACK-END) ---
+def carregar_itens(nome_instrumento=INSTRUMENTO_PADRAO):
+    """Instrumento compilado (itens, índice por bloco, máscara de reversos).
+
+    O cache é do processo (itens.py), compartilhado por todas as sessões e
+    invalidado quando o arquivo de definição muda.
+    """
+    return carregar_instrumento(nome_instrumento)
+
+# --- INSTRUMENTO (ESCOLHIDO PELA URL) ---
+# "?inst=<nome>" seleciona instrumentos/<nome>.json; sem o parâmetro, usa o padrão
+nome_instrumento = st.query_params.get("inst", INSTRUMENTO_PADRAO)
+try:
+    instrumento = carregar_itens(nome_instrumento)
+except (FileNotFoundError, ValueError):
+    st.error(f"Questionário '{nome_instrumento}' não encontrado. Verifique o link.")
+    encerrar_execucao("instrumento_invalido")
+
+# --- FORMATO DE GRAVAÇÃO ---
+# "longo": uma linha por item na aba "Likert" (padrão)
+# "largo": uma linha por envio na aba "Likert Largo", colunas por ID de item
+# Instrumentos além do padrão gravam em abas próprias ("Likert - <nome>").
+FORMATO_RESPOSTAS = ler_config("formato_respostas", "longo")
+if FORMATO_RESPOSTAS not in FORMATOS:
+    FORMATO_RESPOSTAS = "longo"
+ABA_RESPOSTAS = aba_respostas(FORMATO_RESPOSTAS, instrumento.nome)
+CABECALHO_ABA = tuple(cabecalho_largo(instrumento.itens)) if FORMATO_RESPOSTAS == "largo" else None
+
+# --- DESTINO DOS ENVIOS ---
+# "planilha": direto na aba do Google Sheets, via fila de envio (padrão)
+# "sqlite": banco local (sem cota da API); com "espelho_planilha" ligado, uma
+# thread copia os envios para a planilha em lotes
+TIPO_ARMAZENAMENTO = ler_config("armazenamento", "planilha")
+
 # --- CONEXÃO COM GOOGLE SHEETS (MODIFICADO) ---
+# A conexão não é mais aberta no carregamento da página: quem a abre é a thread
+# da fila de envio, no primeiro envio (ou no aquecimento). Assim o cold start
+# não paga a importação do gspread nem a autenticação antes de renderizar.
+def abrir_cliente_planilhas():
+    """Cliente gspread autorizado com a service account dos secrets."""
+    if os.environ.get("LIKERT_PLANILHA_FAKE"):
+        # Testes de carga: abas em memória compartilhadas pelo processo
+        from planilha_fake import ClienteFake, planilha_compartilhada
+        return ClienteFake(fabrica_aba=planilha_compartilhada)
+
+    import gspread  # Importação tardia: só é necessária para enviar respostas
+
+    creds_dict = dict(st.secrets["google_credentials"])
+    creds_dict['private_key'] = creds_dict['private_key'].replace('\\n', '\n')
+    cliente = gspread.service_account_from_dict(creds_dict)
+    # Sem timeout o gspread espera para sempre: uma chamada travada nunca falharia nem abriria o disjuntor
+    cliente.set_timeout(float(ler_config("sheets_timeout", 30)))
+    return cliente
+
+@st.cache_resource
+def obter_conexao():
+    """Cliente e abas compartilhados pelo processo, com reconexão automática e disjuntor."""
+    conexao = ConexaoPlanilha(
+        abrir_cliente_planilhas,
+        limiar_falhas=int(ler_config("sheets_limiar_falhas", 5)),
+        tempo_abertura=float(ler_config("sheets_tempo_abertura", 30)),
+    )
+    codigos_circuito = {"fechado": 0, "meio_aberto": 1, "aberto": 2}
+    metricas.registrar_coletor(
+        lambda registro: registro.definir("likert_sheets_circuito_estado", codigos_circuito[conexao.disjuntor.estado])
+    )
+    return conexao
+
+def connect_to_gsheet(nome_aba="Likert", cabecalho=None):
+    """Aba de respostas gerenciada: nenhuma chamada à API acontece até o primeiro uso."""
+    return obter_conexao().aba(nome_aba, cabecalho)
+
+# --- FILA DE ENVIO (COMPARTILHADA ENTRE SESSÕES) ---
 @st.cache_resource
-def connect_to_gsheet():
-    """Conecta ao Google Sheets e retorna o objeto da aba de respostas."""
+def obter_fila_envio(nome_aba, cabecalho=None):
+    """Cria a fila write-behind que agrupa os envios de todas as sessões em lotes."""
+    # Um spool por aba, derivado do nome dela; "Likert" mantém o arquivo histórico
+    caminho_spool = os.environ.get("LIKERT_SPOOL", "spool_envios.sqlite3")
+    if nome_aba != "Likert":
+        raiz, extensao = os.path.splitext(caminho_spool)
+        caminho_spool = f"{raiz}-{hashlib.sha1(nome_aba.encode('utf-8')).hexdigest()[:8]}{extensao}"
+    fila = FilaEnvio(connect_to_gsheet(nome_aba, cabecalho), caminho_spool=caminho_spool, aba=nome_aba)
+
+    def coletar(registro):
+        estatisticas = fila.estatisticas()
+        registro.definir("likert_fila_envios_pendentes", estatisticas["envios_pendentes"], aba=nome_aba)
+        registro.definir("likert_fila_idade_mais_antigo_segundos", estatisticas["idade_mais_antigo_s"], aba=nome_aba)
+
+    metricas.registrar_coletor(coletar)
+    return fila
+
+@st.cache_resource
+def obter_banco_respostas(caminho):
+    """Banco SQLite compartilhado por todas as sessões (e espelho na planilha, se configurado)."""
+    banco = ArmazenamentoSQLite(caminho)
+    if ler_config("espelho_planilha", False):
+        def abrir_aba(nome):
+            itens_inst = carregar_itens(nome).itens
+            cabecalho = cabecalho_largo(itens_inst) if FORMATO_RESPOSTAS == "largo" else None
+            return connect_to_gsheet(aba_respostas(FORMATO_RESPOSTAS, nome), cabecalho)
+
+        EspelhoPlanilha(
+            banco, abrir_aba, formato=FORMATO_RESPOSTAS,
+            intervalo=float(ler_config("espelho_intervalo", 60)),
+        ).iniciar()
+    return banco
+
+if TIPO_ARMAZENAMENTO == "sqlite":
+    armazenamento = obter_banco_respostas(ler_config("sqlite_arquivo", "respostas.sqlite3"))
+else:
+    armazenamento = ArmazenamentoPlanilha(obter_fila_envio(ABA_RESPOSTAS, CABECALHO_ABA), FORMATO_RESPOSTAS)
+
+# --- RASCUNHOS (COMPARTILHADOS ENTRE SESSÕES) ---
+@st.cache_resource
+def obter_rascunhos():
+    """Armazém SQLite dos rascunhos, indexados pelo token de retomada (?r=<token>)."""
+    # LIKERT_RASCUNHOS (testes de carga) tem precedência sobre o secret
+    return ArmazemRascunhos(os.environ.get("LIKERT_RASCUNHOS") or ler_config("rascunhos_arquivo", "rascunhos.sqlite3"))
+
+# --- RELATÓRIOS INDIVIDUAIS (PROCESSOS À PARTE, CACHE COMPARTILHADO) ---
+@st.cache_resource
+def obter_gerador_relatorios():
+    """Pool de renderização dos gráficos, com cache pelo hash do perfil de pontuação."""
+    return GeradorRelatorios(max_processos=int(ler_config("relatorio_processos", 2)))
+
+TEMPO_MAXIMO_RELATORIO = float(ler_config("relatorio_tempo_maximo", 120))  # Segundos até desistir de exibir o relatório
+
+# --- AQUECIMENTO (KEEP-ALIVE) ---
+# Acessado pelo pinger.py com "?aquecer=1": popula os caches do processo
+# (itens, conexão com a planilha e processos de relatório) e encerra sem
+# desenhar o questionário.
+if st.query_params.get("aquecer"):
+    from pontuacao import esquema_de  # Carrega o NumPy aqui, e não no primeiro envio
+
+    for nome in listar_instrumentos():
+        esquema_de(carregar_itens(nome).itens)
     try:
-        creds_dict = dict(st.secrets["google_credentials"])
-        creds_dict['private_key'] = creds_dict['private_key'].replace('\\n', '\n')
-        
-        gc = gspread.service_account_from_dict(creds_dict)
-        spreadsheet = gc.open("Respostas Formularios")
-        
-        # Retorna apenas a aba de respostas
-        return spreadsheet.worksheet("Likert")
+        obter_conexao().verificar(ABA_RESPOSTAS)
+        st.text("aquecido: ok")
     except Exception as e:
-        st.error(f"Erro ao conectar com o Google Sheets: {e}")
-        return None
+        print(f"Aquecimento: falha ao conectar com o Google Sheets: {e}")
+        st.text("aquecido: sem conexão com a planilha")
+    try:
+        obter_gerador_relatorios().aquecer()
+    except Exception as e:
+        print(f"Aquecimento: falha ao iniciar o gerador de relatórios: {e}")
+    encerrar_execucao("aquecimento")
 
-ws_respostas = connect_to_gsheet()
+# --- CABEÇALHO DA APLICAÇÃO ---
+@st.cache_resource
+def logo_base64(caminho):
+    """Logo embutido em base64: st.image importa o NumPy, o que pesaria em toda primeira execução."""
+    import base64
 
-if ws_respostas is None:
-    st.error("Não foi possível conectar à aba 'Likert' da planilha. Verifique o nome e as permissões.")
-    st.stop()
+    with open(caminho, "rb") as f:
+        return base64.b64encode(f.read()).decode("ascii")
 
-# --- CABEÇALHO DA APLICAÇÃO ---
 col1, col2 = st.columns([1, 4])
 with col1:
     try:
-        st.image("logo_wedja.jpg", width=120)
+        st.markdown(f"<img src='data:image/jpeg;base64,{logo_base64('logo_wedja.jpg')}' width='120'>", unsafe_allow_html=True)
     except FileNotFoundError:
         st.warning("Logo 'logo_wedja.jpg' não encontrada.")
 with col2:
     st.markdown(f"""
     <div style="display: flex; align-items: center; height: 100%;">
-        <h1 style='color: {COLOR_TEXT_DARK}; margin: 0; padding: 0;'>INVENTÁRIO DE INFRAESTRUTURA</h1>
+        <h1 style='color: {COLOR_TEXT_DARK}; margin: 0; padding: 0;'>{instrumento.titulo}</h1>
     </div>
     """, unsafe_allow_html=True)
 
@@ -133,61 +299,80 @@ with st.container(border=True):
     st.markdown("<h3 style='text-align: center;'>Identificação</h3>", unsafe_allow_html=True)
     
 # --- Lógica de Verificação da URL ---
-    org_coletora_valida = "Instituto Wedja de Socionomia" # Valor padrão seguro
-    link_valido = False # Começa como inválido por padrão
+# O HMAC roda uma vez por sessão e conjunto de parâmetros (ver links.py); nos
+# reruns seguintes só a validade é conferida de novo.
+MENSAGENS_LINK = {
+    "expirado": "Link Expirado. Por favor, solicite um novo link.",
+    "assinatura_invalida": "Link inválido ou adulterado.",
+    "parametros_faltando": "Link inválido. Faltando parâmetros de segurança.",
+    "erro_configuracao": "ERRO DE CONFIGURAÇÃO: O app não pôde verificar a segurança do link. Contate o administrador.",
+}
 
-try:
-    query_params = st.query_params
-    org_encoded_from_url = query_params.get("org")
-    exp_from_url = query_params.get("exp") # Parâmetro de expiração
-    sig_from_url = query_params.get("sig") # Parâmetro de assinatura
-    
-    # 1. Verifica se todos os parâmetros de segurança existem
-    if org_encoded_from_url and exp_from_url and sig_from_url:
-        org_decoded = urllib.parse.unquote(org_encoded_from_url)
-        
-        # 2. Recalcula a assinatura (com base na org + exp)
-        secret_key = st.secrets["LINK_SECRET_KEY"].encode('utf-8')
-        message = f"{org_decoded}|{exp_from_url}".encode('utf-8')
-        calculated_sig = hmac.new(secret_key, message, hashlib.sha256).hexdigest()
-        
-        # 3. Compara as assinaturas
-        if hmac.compare_digest(calculated_sig, sig_from_url):
-            # Assinatura OK! Agora verifica a data de validade
-            timestamp_validade = int(exp_from_url)
-            timestamp_atual = int(datetime.now().timestamp())
-            
-            if timestamp_atual <= timestamp_validade:
-                # SUCESSO: Assinatura válida E dentro da data
-                link_valido = True
-                org_coletora_valida = org_decoded
-            else:
-                # FALHA: Link expirou
-                st.error("Link Expirado. Por favor, solicite um novo link.")
-        else:
-            # FALHA: Assinatura não bate, link adulterado
-            st.error("Link inválido ou adulterado.")
+parametros_link = tuple(st.query_params.get(nome) for nome in ("org", "exp", "sig"))
+verificacao_link = st.session_state.get("verificacao_link")
+if verificacao_link is None or verificacao_link[0] != parametros_link:
+    try:
+        verificado = verificar_link(*parametros_link, chave=ler_config("LINK_SECRET_KEY"))
+    except Exception as e:
+        verificado = ResultadoLink("erro", detalhe=str(e))
+    st.session_state.verificacao_link = (parametros_link, verificado)
+    metricas.incrementar("likert_link_verificacao_total", resultado=verificado.motivo)
+else:
+    verificado = verificacao_link[1].na_data()
+
+resultado_link = verificado.motivo # Rótulo da métrica de verificação do link
+link_valido = verificado.valido
+org_coletora_valida = verificado.organizacao or "Instituto Wedja de Socionomia" # Valor padrão seguro
+if resultado_link == "erro":
+    st.error(f"Erro ao processar o link: {verificado.detalhe}")
+elif resultado_link in MENSAGENS_LINK:
+    st.error(MENSAGENS_LINK[resultado_link])
+
+# --- RASCUNHO: RESTAURAÇÃO E AUTOSALVAMENTO ---
+# As respostas ficam num vetor compacto (um byte por item) e são salvas a cada
+# clique sob o token da sessão. O token não fica na barra de endereço (o link da
+# campanha costuma ser repassado a colegas): o respondente recebe um link de
+# retomada pessoal, com ?r=<token>, e ao abri-lo o parâmetro sai da URL.
+rascunhos = obter_rascunhos()
+
+def salvar_rascunho():
+    """Grava o vetor de respostas e o respondente sob o token da sessão."""
+    if "token_rascunho" in st.session_state:
+        rascunhos.salvar(
+            st.session_state.token_rascunho, instrumento, st.session_state.vetor_respostas,
+            st.session_state.get("input_respondente", ""),
+        )
+
+if link_valido and "vetor_respostas" not in st.session_state:
+    token = st.query_params.get("r")
+    rascunho = rascunhos.carregar(token, instrumento) if token_valido(token) else None
+    if rascunho is not None:
+        st.session_state.vetor_respostas, respondente_salvo = rascunho
+        if respondente_salvo:
+            st.session_state.input_respondente = respondente_salvo
+        st.toast("Rascunho recuperado: suas respostas anteriores foram restauradas.")
+        metricas.incrementar("likert_rascunhos_restaurados_total")
     else:
-         # Se nenhum parâmetro for passado (acesso direto), permite o uso com valor padrão
-         if not (org_encoded_from_url or exp_from_url or sig_from_url):
-             link_valido = True
-         else:
-             st.error("Link inválido. Faltando parâmetros de segurança.")
-
-except KeyError:
-     st.error("ERRO DE CONFIGURAÇÃO: O app não pôde verificar a segurança do link. Contate o administrador.")
-     link_valido = False
-except Exception as e:
-    st.error(f"Erro ao processar o link: {e}")
-    link_valido = False
+        # Só um rascunho existente é retomado: um ?r= escolhido por terceiros não vira o token da sessão
+        token = novo_token()
+        st.session_state.vetor_respostas = VetorRespostas(len(instrumento.itens))
+    st.session_state.token_rascunho = token
+if "r" in st.query_params:
+    del st.query_params["r"]  # A barra de endereço volta a ser o link compartilhável da campanha
+
+def link_retomada():
+    """Link pessoal que reabre o formulário com o rascunho desta sessão."""
+    parametros = {chave: valor for chave, valor in st.query_params.items() if chave != "r"}
+    parametros["r"] = st.session_state.token_rascunho
+    return f"{(st.context.url or '').split('?')[0]}?{urlencode(parametros)}"
 
 # Renderiza os campos de identificação
 with st.container(border=True):
     st.markdown("<h3 style='text-align: center;'>Identificação</h3>", unsafe_allow_html=True)
     col1_form, col2_form = st.columns(2)
     with col1_form:
-        respondente = st.text_input("Respondente:", key="input_respondente")
-        data = st.text_input("Data:", datetime.now().strftime('%d/%m/%Y')) 
+        respondente = st.text_input("Respondente:", key="input_respondente", max_chars=200, on_change=salvar_rascunho)
+        data = st.text_input("Data:", datetime.now().strftime('%d/%m/%Y'), max_chars=20)
     with col2_form:
         # O campo agora usa o valor validado e está sempre desabilitado
         organizacao_coletora = st.text_input(
@@ -195,11 +380,18 @@ with st.container(border=True):
             value=org_coletora_valida, 
             disabled=True
         )
+    if link_valido:
+        with st.expander("Continuar depois"):
+            st.caption(
+                "Suas respostas são salvas automaticamente. Guarde este link para retomá-las; "
+                "ele é pessoal — para convidar colegas, envie o link original."
+            )
+            st.code(link_retomada(), language=None)
 
 # --- BLOQUEIO DO FORMULÁRIO SE O LINK FOR INVÁLIDO ---
 if not link_valido:
     st.error("Acesso ao formulário bloqueado.")
-    st.stop() # Para a execução, escondendo o questionário e o botão de envio
+    encerrar_execucao("link_invalido") # Para a execução, escondendo o questionário e o botão de envio
 else:
 # --- INSTRUÇÕES ---
     with st.expander("Ver Orientações aos Respondentes", expanded=True):
@@ -211,169 +403,157 @@ else:
         )
 
 
-    # --- LÓGICA DO QUESTIONÁRIO (BACK-END) ---
-    @st.cache_data
-    def carregar_itens():
-        data = [
-            ('Instalações Físicas', 'IF01', 'O espaço físico é suficiente para as atividades sem congestionamentos.', 'NÃO'),
-            ('Instalações Físicas', 'IF02', 'A limpeza e a organização das áreas são mantidas ao longo do dia.', 'NÃO'),
-            ('Instalações Físicas', 'IF03', 'A iluminação geral é adequada às tarefas realizadas.', 'NÃO'),
-            ('Instalações Físicas', 'IF04', 'A temperatura e a ventilação são adequadas ao tipo de atividade.', 'NÃO'),
-            ('Instalações Físicas', 'IF05', 'O nível de ruído não prejudica a concentração e a comunicação.', 'NÃO'),
-            ('Instalações Físicas', 'IF06', 'A sinalização de rotas, setores e riscos é clara e suficiente.', 'NÃO'),
-            ('Instalações Físicas', 'IF07', 'As saídas de emergência estão desobstruídas e bem sinalizadas.', 'NÃO'),
-            ('Instalações Físicas', 'IF08', 'O layout facilita o fluxo de pessoas, materiais e informações.', 'NÃO'),
-            ('Instalações Físicas', 'IF09', 'As áreas de armazenamento são dimensionadas e identificadas adequadamente.', 'NÃO'),
-            ('Instalações Físicas', 'IF10', 'A infraestrutura é acessível (rampas, corrimãos, largura de portas) para PCD.', 'NÃO'),
-            ('Instalações Físicas', 'IF11', 'Pisos, paredes e tetos estão em bom estado de conservação.', 'NÃO'),
-            ('Instalações Físicas', 'IF12', 'Há obstáculos ou áreas obstruídas que dificultam a circulação.', 'SIM'),
-            ('Equipamentos', 'EQ01', 'Os equipamentos necessários estão disponíveis quando requisitados.', 'NÃO'),
-            ('Equipamentos', 'EQ02', 'Os equipamentos possuem capacidade/recursos adequados às tarefas.', 'NÃO'),
-            ('Equipamentos', 'EQ03', 'Os equipamentos operam de forma confiável, sem falhas frequentes.', 'NÃO'),
-            ('Equipamentos', 'EQ04', 'O plano de manutenção preventiva está atualizado e é cumprido.', 'NÃO'),
-            ('Equipamentos', 'EQ05', 'O histórico de manutenção está documentado e acessível.', 'NÃO'),
-            ('Equipamentos', 'EQ06', 'Instrumentos críticos estão calibrados dentro dos prazos.', 'NÃO'),
-            ('Equipamentos', 'EQ07', 'Há disponibilidade de peças de reposição críticas.', 'NÃO'),
-            ('Equipamentos', 'EQ08', 'Os usuários dos equipamentos recebem treinamento adequado.', 'NÃO'),
-            ('Equipamentos', 'EQ09', 'Manuais e procedimentos de operação estão acessíveis.', 'NÃO'),
-            ('Equipamentos', 'EQ10', 'Dispositivos de segurança (proteções, intertravamentos) estão instalados e operantes.', 'NÃO'),
-            ('Equipamentos', 'EQ11', 'Paradas não planejadas atrapalham significativamente a rotina de trabalho.', 'SIM'),
-            ('Equipamentos', 'EQ12', 'Há equipamentos obsoletos que comprometem a qualidade ou a segurança.', 'SIM'),
-            ('Ferramentas', 'FE01', 'As ferramentas necessárias estão disponíveis quando preciso.', 'NÃO'),
-            ('Ferramentas', 'FE02', 'As ferramentas possuem qualidade e são adequadas ao trabalho.', 'NÃO'),
-            ('Ferramentas', 'FE03', 'As ferramentas manuais são ergonômicas e confortáveis de usar.', 'NÃO'),
-            ('Ferramentas', 'FE04', 'Existe padronização adequada de tipos e modelos de ferramentas.', 'NÃO'),
-            ('Ferramentas', 'FE05', 'Ferramentas estão identificadas (etiquetas/códigos) e rastreáveis.', 'NÃO'),
-            ('Ferramentas', 'FE06', 'O armazenamento é organizado (5S) e evita danos/perdas.', 'NÃO'),
-            ('Ferramentas', 'FE07', 'Manutenção/afiação/ajustes estão em dia quando necessário.', 'NÃO'),
-            ('Ferramentas', 'FE08', 'Ferramentas compartilhadas raramente estão onde deveriam.', 'SIM'),
-            ('Ferramentas', 'FE09', 'Os colaboradores são treinados para o uso correto das ferramentas.', 'NÃO'),
-            ('Ferramentas', 'FE10', 'Ferramentas danificadas são substituídas com rapidez.', 'NÃO'),
-            ('Ferramentas', 'FE11', 'Existem ferramentas improvisadas em uso nas atividades.', 'SIM'),
-            ('Ferramentas', 'FE12', 'As ferramentas estão em conformidade com requisitos de segurança (isolantes, antifaísca, etc.).', 'NÃO'),
-            ('Postos de Trabalho', 'PT01', 'O posto permite ajuste ergonômico (altura, apoios, cadeiras).', 'NÃO'),
-            ('Postos de Trabalho', 'PT02', 'Materiais e dispositivos estão posicionados ao alcance adequado.', 'NÃO'),
-            ('Postos de Trabalho', 'PT03', 'A iluminação focal no posto é adequada.', 'NÃO'),
-            ('Postos de Trabalho', 'PT04', 'Ruído e vibração no posto estão dentro de limites aceitáveis.', 'NÃO'),
-            ('Postos de Trabalho', 'PT05', 'Há ventilação/exaustão local adequada quando necessário.', 'NÃO'),
-            ('Postos de Trabalho', 'PT06', 'Os EPIs necessários estão disponíveis, em bom estado e são utilizados.', 'NÃO'),
-            ('Postos de Trabalho', 'PT07', 'O posto está organizado (5S) e livre de excessos.', 'NÃO'),
-            ('Postos de Trabalho', 'PT08', 'Instruções de trabalho estão visíveis e atualizadas.', 'NÃO'),
-            ('Postos de Trabalho', 'PT09', 'Computadores, softwares e internet funcionam de forma estável.', 'NÃO'),
-            ('Postos de Trabalho', 'PT10', 'O desenho do posto induz posturas forçadas ou movimentos repetitivos excessivos.', 'SIM'),
-            ('Postos de Trabalho', 'PT11', 'Há falta de EPI adequado ou em bom estado.', 'SIM'),
-            ('Postos de Trabalho', 'PT12', 'Cabos, fios ou objetos soltos representam riscos no posto.', 'SIM'),
-        ]
-        df = pd.DataFrame(data, columns=["Bloco", "ID", "Item", "Reverso"])
-        return df
-
     # --- INICIALIZAÇÃO E FORMULÁRIO DINÂMICO ---
-    df_itens = carregar_itens()
-    if 'respostas' not in st.session_state:
-        st.session_state.respostas = {}
+    indice_blocos = instrumento.blocos
+    vetor_respostas = st.session_state.vetor_respostas
 
-    st.subheader("Questionário")
-    blocos = df_itens["Bloco"].unique().tolist()
-    def registrar_resposta(item_id, key):
-        st.session_state.respostas[item_id] = st.session_state[key]
+    total_perguntas = len(instrumento.itens)
+    limite_respostas = total_perguntas / 2
 
-    for bloco in blocos:
-        df_bloco = df_itens[df_itens["Bloco"] == bloco]
-        prefixo_bloco = df_bloco['ID'].iloc[0][:2] if not df_bloco.empty else bloco
-        
-        with st.expander(f"{prefixo_bloco}", expanded=(bloco == blocos[0])):
-            for _, row in df_bloco.iterrows():
-                item_id = row["ID"]
-                label = f'({item_id}) {row["Item"]}' + (' (R)' if row["Reverso"] == 'SIM' else '')
-                widget_key = f"radio_{item_id}"
-                st.radio(
-                    label, options=["N/A", 1, 2, 3, 4, 5],
-                    horizontal=True, key=widget_key,
-                    on_change=registrar_resposta, args=(item_id, widget_key)
-                )
+    def contar_respostas_validas():
+        """Número de respostas válidas (excluindo N/A), mantido pelo próprio vetor."""
+        return st.session_state.vetor_respostas.validas
+
+    def registrar_resposta(posicao, key):
+        # Lê o vetor da sessão (não o da execução anterior): ele é trocado depois de um envio
+        vetor = st.session_state.vetor_respostas
+        validas_antes = vetor.validas
+        vetor.definir(posicao, st.session_state[key])
+        validas_depois = vetor.validas
+        salvar_rascunho()
+        # Se o botão de envio mudou de estado (habilitado/desabilitado), é preciso
+        # uma execução completa; caso contrário só o bloco alterado é redesenhado
+        if (validas_antes < limite_respostas) != (validas_depois < limite_respostas):
+            st.session_state.rerun_completo = True
+
+    def exibir_progresso(area):
+        respostas_validas_contadas = contar_respostas_validas()
+        if respostas_validas_contadas < limite_respostas:
+            area.warning(f"Responda 50% das perguntas (excluindo 'N/A') para habilitar o envio. ({respostas_validas_contadas}/{total_perguntas} válidas)")
+        else:
+            area.empty()
+
+    # Cada bloco é um fragmento: um clique em um rádio reexecuta só o próprio
+    # bloco (e o contador de progresso), sem redesenhar o resto da página
+    @st.fragment
+    def renderizar_bloco(prefixo_bloco, itens_bloco, expandido, area_progresso):
+        with metricas.cronometrar("likert_bloco_segundos", bloco=prefixo_bloco):
+            with st.expander(f"{prefixo_bloco}", expanded=expandido):
+                for item_id, label in itens_bloco:
+                    widget_key = f"radio_{item_id}"
+                    posicao = instrumento.posicao[item_id]
+                    st.radio(
+                        label, options=["N/A", 1, 2, 3, 4, 5],
+                        index=vetor_respostas.indice_opcao(posicao),  # Só vale na criação (ex.: rascunho restaurado)
+                        horizontal=True, key=widget_key,
+                        on_change=registrar_resposta, args=(posicao, widget_key)
+                    )
+            if st.session_state.pop("rerun_completo", False):
+                st.rerun()
+            exibir_progresso(area_progresso)
+
+    st.subheader("Questionário")
+    area_blocos = st.container()
 
     # --- VALIDAÇÃO E BOTÃO DE FINALIZAR (MOVIDO PARA O FINAL) ---
-    # Calcula o número de respostas válidas (excluindo N/A)
-    respostas_validas_contadas = 0
-    if 'respostas' in st.session_state:
-        for resposta in st.session_state.respostas.values():
-            if resposta is not None and resposta != "N/A":
-                respostas_validas_contadas += 1
-
-    total_perguntas = len(df_itens)
-    limite_respostas = total_perguntas / 2
+    area_progresso = st.empty()
+    with area_blocos:
+        for i, (bloco, prefixo_bloco, itens_bloco) in enumerate(indice_blocos):
+            renderizar_bloco(prefixo_bloco, itens_bloco, i == 0, area_progresso)
 
     # Determina se o botão deve ser desabilitado
-    botao_desabilitado = respostas_validas_contadas < limite_respostas
-
-    # Exibe aviso se o botão estiver desabilitado
-    if botao_desabilitado:
-        st.warning(f"Responda 50% das perguntas (excluindo 'N/A') para habilitar o envio. ({respostas_validas_contadas}/{total_perguntas} válidas)")
+    botao_desabilitado = contar_respostas_validas() < limite_respostas
 
     # Botão Finalizar com estado dinâmico (habilitado/desabilitado)
     if st.button("Finalizar e Enviar Respostas", type="primary", disabled=botao_desabilitado):
             st.subheader("Enviando Respostas...")
 
-            # --- LÓGICA DE CÁLCULO ---
-            respostas_list = []
-            for index, row in df_itens.iterrows():
-                item_id = row['ID']
-                resposta_usuario = st.session_state.respostas.get(item_id)
-                respostas_list.append({
-                    "Bloco": row["Bloco"],
-                    "Item": row["Item"],
-                    "Resposta": resposta_usuario,
-                    "Reverso": row["Reverso"]
-                })
-            dfr = pd.DataFrame(respostas_list)
-
             # --- LÓGICA DE ENVIO PARA GOOGLE SHEETS ---
-            with st.spinner("Enviando dados para a planilha..."):
+            with st.spinner("Registrando respostas..."):
                 try:
                     timestamp_str = datetime.now().isoformat(timespec="seconds")
             
                     nome_limpo = organizacao_coletora.strip().upper()
                     id_organizacao = hashlib.md5(nome_limpo.encode('utf-8')).hexdigest()[:8].upper()
 
-                    respostas_para_enviar = []
-                    
-                    for _, row in dfr.iterrows():
+                    respostas = vetor_respostas.como_dicionario(tuple(instrumento.posicao))
+                    meta = [timestamp_str, id_organizacao, respondente, data, org_coletora_valida]
 
-                        resposta = row["Resposta"]
-                        pontuacao = "N/A" # Valor padrão se for N/A ou None
-                    
-                        if pd.notna(resposta) and resposta != "N/A":
-                            try:
-                                valor = int(resposta)
-                                if row["Reverso"] == "SIM":
-                                    pontuacao = 6 - valor # Inverte: 1->5, 2->4, etc.
-                                else:
-                                    pontuacao = valor # Normal
-                            except ValueError:
-                                pass
-
-                        respostas_para_enviar.append([
-                            timestamp_str,
-                            id_organizacao,
-                            respondente,
-                            data,
-                            org_coletora_valida,
-                            row["Bloco"],
-                            row["Item"],
-                            row["Resposta"] if pd.notna(row["Resposta"]) else "N/A",
-                            pontuacao
-                        ])
+                    # Planilha: spool local + fila em lotes; SQLite: uma transação local
+                    armazenamento.registrar_envio(meta, instrumento, respostas)
+                    # Enviado: o rascunho sai, e a sessão recomeça com outro token e respostas em branco
+                    rascunhos.remover(st.session_state.token_rascunho)
+                    st.session_state.token_rascunho = novo_token()
+                    st.session_state.vetor_respostas = VetorRespostas(len(instrumento.itens))
+                    metricas.incrementar("likert_envios_total", formato=FORMATO_RESPOSTAS, armazenamento=armazenamento.nome)
+                    metricas.observar("likert_reruns_por_envio", st.session_state.reruns, limites=metricas.BUCKETS_TAMANHO)
                     
-                    ws_respostas.append_rows(respostas_para_enviar, value_input_option='USER_ENTERED')
-                    
-                    st.success("Suas respostas foram enviadas com sucesso!")
+                    # Relatório individual: a renderização já começa, em outro processo
+                    from pontuacao import esquema_de, pontuar  # NumPy só no primeiro envio
+
+                    esquema = esquema_de(instrumento.itens)
+                    perfil = perfil_de(pontuar(respostas, esquema), esquema, instrumento.titulo)
+                    for formato_relatorio in FORMATOS_RELATORIO:
+                        obter_gerador_relatorios().solicitar(perfil, formato_relatorio)
+                    st.session_state.relatorio_perfil = perfil  # Os bytes ficam no cache do gerador, não na sessão
+                    st.session_state.relatorio_inicio = time.monotonic()
+
+                    st.success("Suas respostas foram registradas com sucesso!")
                     st.balloons()
                 except Exception as e:
-                    st.error(f"Erro ao enviar dados para a planilha: {e}")
-
-with st.empty():
-    st.markdown('<div id="autoclick-div">', unsafe_allow_html=True)
-    if st.button("Ping Button", key="autoclick_button"):
-    # A ação aqui pode ser um simples print no log do Streamlit
-        print("Ping button clicked by automation.")
-    st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+                    metricas.incrementar("likert_erros_total", local="envio")
+                    metricas.registrar_evento("erro_envio", erro=str(e))
+                    st.error(f"Erro ao registrar as respostas: {e}")
+
+    # --- RELATÓRIO INDIVIDUAL (APÓS O ENVIO) ---
+    # A execução do envio não espera a renderização: o perfil fica na sessão
+    # e um fragmento consulta o gerador a cada segundo até os dois ficarem prontos.
+    def futuros_relatorio():
+        gerador = obter_gerador_relatorios()
+        return {
+            formato_relatorio: gerador.consultar(st.session_state.relatorio_perfil, formato_relatorio)
+            for formato_relatorio in FORMATOS_RELATORIO
+        }
+
+    def exibir_relatorio(futuros):
+        if not all(futuro.done() for futuro in futuros.values()):
+            if time.monotonic() - st.session_state.relatorio_inicio > TEMPO_MAXIMO_RELATORIO:
+                st.warning("Não foi possível gerar o relatório: tempo esgotado.")
+            else:
+                st.info("Gerando seu relatório...")
+            return False
+        try:
+            relatorio_png, relatorio_pdf = futuros["png"].result(), futuros["pdf"].result()
+        except Exception as e:
+            metricas.incrementar("likert_erros_total", local="relatorio")
+            st.warning(f"Não foi possível gerar o relatório: {e}")
+            return True
+        st.subheader("Seu Relatório")
+        st.image(relatorio_png)
+        col_pdf, col_png = st.columns(2)
+        with col_pdf:
+            st.download_button(
+                "Baixar relatório (PDF)", relatorio_pdf, file_name="relatorio_likert.pdf",
+                mime=FORMATOS_RELATORIO["pdf"], on_click="ignore",
+            )
+        with col_png:
+            st.download_button(
+                "Baixar gráficos (PNG)", relatorio_png, file_name="relatorio_likert.png",
+                mime=FORMATOS_RELATORIO["png"], on_click="ignore",
+            )
+        return True
+
+    @st.fragment(run_every=1.0)
+    def aguardar_relatorio():
+        if exibir_relatorio(futuros_relatorio()) or time.monotonic() - st.session_state.relatorio_inicio > TEMPO_MAXIMO_RELATORIO:
+            st.rerun()  # Execução completa: o relatório passa a ser exibido fora do fragmento, sem consultas periódicas
+
+    if "relatorio_perfil" in st.session_state:
+        futuros = futuros_relatorio()
+        relatorio_pronto = all(futuro.done() for futuro in futuros.values())
+        if relatorio_pronto or time.monotonic() - st.session_state.relatorio_inicio > TEMPO_MAXIMO_RELATORIO:
+            exibir_relatorio(futuros)
+        else:
+            aguardar_relatorio()
+
+metricas.observar("likert_rerun_segundos", time.perf_counter() - inicio_execucao, resultado="completa")
@@ -0,0 +1,277 @@
+# armazenamento.py
+"""Destinos de gravação dos envios do questionário.
+
+O app grava cada envio por meio de um `Armazenamento`, escolhido na
+configuração (secret "armazenamento"):
+- "planilha" (padrão): `ArmazenamentoPlanilha`, o layout longo ou largo na aba
+  do Google Sheets, via fila de envio (fila_envio.FilaEnvio);
+- "sqlite": `ArmazenamentoSQLite`, uma tabela local em SQLite (modo WAL), uma
+  linha por item, com índices por organização, timestamp e item. Não tem cota
+  nem limite de células, e cada envio é uma única transação (`executemany`).
+
+`EspelhoPlanilha` copia o SQLite para a planilha em lotes, guardando no próprio
+banco o último id copiado, para quem ainda usa a planilha. A cópia é "pelo
+menos uma vez": se a gravação na planilha der certo e o cursor não for salvo,
+o lote se repete na próxima rodada.
+
+Uso do espelho fora do app (ex.: cron):
+    python armazenamento.py --banco respostas.sqlite3 --credenciais conta.json [--formato largo]
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+import metricas
+from formato import linha_larga, linhas_longas
+from itens import INSTRUMENTO_PADRAO
+
+
+def aba_respostas(formato, nome_instrumento=INSTRUMENTO_PADRAO):
+    """Nome da aba de respostas: "Likert" ou "Likert Largo", com " - <nome>" para outros instrumentos."""
+    aba = "Likert Largo" if formato == "largo" else "Likert"
+    if nome_instrumento != INSTRUMENTO_PADRAO:
+        aba = f"{aba} - {nome_instrumento}"
+    return aba
+
+
+class Armazenamento(ABC):
+    """Interface comum: o app só chama `registrar_envio` e `estatisticas`."""
+
+    nome = ""
+
+    @abstractmethod
+    def registrar_envio(self, meta, instrumento, respostas):
+        """Grava um envio. `meta` é (timestamp, id_organizacao, respondente, data, organizacao)."""
+
+    @abstractmethod
+    def estatisticas(self):
+        """Contadores para monitoramento (pendências da fila, linhas gravadas...)."""
+
+
+class ArmazenamentoPlanilha(Armazenamento):
+    """Envios em linhas da aba do Google Sheets, gravadas em lotes pela fila de envio."""
+
+    nome = "planilha"
+
+    def __init__(self, fila, formato="longo"):
+        self.fila = fila
+        self.formato = formato
+
+    def registrar_envio(self, meta, instrumento, respostas):
+        if self.formato == "largo":
+            # Uma linha por envio, colunas por ID de item
+            linhas = [linha_larga(meta, instrumento.itens, respostas, instrumento.versao)]
+        else:
+            # Uma linha por item (layout histórico)
+            linhas = linhas_longas(meta, instrumento.itens, respostas)
+        # Grava no spool local; a thread da fila envia para a planilha em lotes
+        self.fila.enfileirar(linhas)
+
+    def estatisticas(self):
+        return self.fila.estatisticas()
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Envios numa tabela SQLite local, uma linha por item."""
+
+    nome = "sqlite"
+
+    def __init__(self, caminho="respostas.sqlite3"):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                envio TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                id_organizacao TEXT NOT NULL,
+                respondente TEXT,
+                data TEXT,
+                organizacao TEXT,
+                instrumento TEXT NOT NULL,
+                versao TEXT NOT NULL,
+                posicao INTEGER NOT NULL,
+                bloco TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                item TEXT NOT NULL,
+                resposta,
+                pontuacao INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS ix_respostas_organizacao ON respostas (id_organizacao);
+            CREATE INDEX IF NOT EXISTS ix_respostas_timestamp ON respostas (timestamp);
+            CREATE INDEX IF NOT EXISTS ix_respostas_item ON respostas (item_id);
+            CREATE INDEX IF NOT EXISTS ix_respostas_envio ON respostas (envio);
+            CREATE TABLE IF NOT EXISTS espelho (
+                aba TEXT PRIMARY KEY,
+                ultimo_id INTEGER NOT NULL
+            );
+            """
+        )
+
+    def registrar_envio(self, meta, instrumento, respostas):
+        envio = uuid.uuid4().hex
+        registros = [
+            (envio, *linha[:5], instrumento.nome, instrumento.versao, posicao, linha[5], item_id, linha[6], linha[7],
+             None if linha[8] == "N/A" else linha[8])
+            for posicao, ((_, item_id, _, _), linha) in enumerate(zip(instrumento.itens, linhas_longas(meta, instrumento.itens, respostas)))
+        ]
+        with metricas.cronometrar("likert_sqlite_gravacao_segundos"), self._lock:
+            with self._conn:  # Uma transação por envio
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    """INSERT INTO respostas (envio, timestamp, id_organizacao, respondente, data, organizacao,
+                                              instrumento, versao, posicao, bloco, item_id, item, resposta, pontuacao)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    registros,
+                )
+
+    def estatisticas(self):
+        with self._lock:
+            linhas, envios = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT envio) FROM respostas").fetchone()
+        return {"linhas": linhas, "envios": envios}
+
+    # --- LEITURA PARA O ESPELHO ---
+    def envios_apos(self, instrumento, ultimo_id, limite_envios):
+        """Envios completos do instrumento com id > `ultimo_id`, em ordem: [(último id, [linhas]), ...].
+
+        Cada linha é (timestamp, id_organizacao, respondente, data, organizacao,
+        versao, bloco, item, resposta, pontuacao).
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                """SELECT envio, id, timestamp, id_organizacao, respondente, data, organizacao,
+                          versao, bloco, item, resposta, pontuacao
+                   FROM respostas
+                   WHERE envio IN (
+                       SELECT envio FROM respostas WHERE instrumento = ? AND id > ?
+                       GROUP BY envio ORDER BY MIN(id) LIMIT ?
+                   )
+                   ORDER BY id""",
+                (instrumento, ultimo_id, limite_envios),
+            ).fetchall()
+        envios = {}
+        for envio, id_linha, *valores in linhas:
+            ultimo, grupo = envios.get(envio, (0, []))
+            grupo.append(valores)
+            envios[envio] = (max(ultimo, id_linha), grupo)
+        return list(envios.values())
+
+    def instrumentos(self):
+        with self._lock:
+            return [nome for (nome,) in self._conn.execute("SELECT DISTINCT instrumento FROM respostas")]
+
+    def cursor_espelho(self, aba):
+        with self._lock:
+            linha = self._conn.execute("SELECT ultimo_id FROM espelho WHERE aba = ?", (aba,)).fetchone()
+        return linha[0] if linha else 0
+
+    def salvar_cursor_espelho(self, aba, ultimo_id):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO espelho (aba, ultimo_id) VALUES (?, ?)", (aba, ultimo_id))
+
+
+class EspelhoPlanilha:
+    """Copia os envios do SQLite para as abas da planilha, em lotes, a partir de um cursor."""
+
+    def __init__(self, armazenamento, abrir_aba, formato="longo", envios_por_lote=200, intervalo=60.0, intervalo_minimo=1.1):
+        self.armazenamento = armazenamento
+        self._abrir_aba = abrir_aba  # nome do instrumento → worksheet (ex.: aba gerenciada de conexao.py)
+        self.formato = formato
+        self.envios_por_lote = envios_por_lote
+        self.intervalo = intervalo  # Segundos entre rodadas na thread
+        self.intervalo_minimo = intervalo_minimo  # Segundos entre chamadas à API
+        self._abas = {}
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _linhas_planilha(self, grupo):
+        if self.formato == "largo":
+            # Uma linha por envio: metadados, versão e as respostas na ordem dos itens
+            primeira = grupo[0]
+            return [list(primeira[:5]) + [primeira[5]] + [linha[8] for linha in grupo]]
+        return [list(linha[:5]) + [linha[6], linha[7], linha[8], "N/A" if linha[9] is None else linha[9]] for linha in grupo]
+
+    def sincronizar(self):
+        """Copia tudo o que falta, lote a lote. Retorna o número de envios copiados."""
+        copiados = 0
+        for instrumento in self.armazenamento.instrumentos():
+            aba = aba_respostas(self.formato, instrumento)
+            if instrumento not in self._abas:
+                self._abas[instrumento] = self._abrir_aba(instrumento)
+            while True:
+                envios = self.armazenamento.envios_apos(instrumento, self.armazenamento.cursor_espelho(aba), self.envios_por_lote)
+                if not envios:
+                    break
+                linhas = [linha for _, grupo in envios for linha in self._linhas_planilha(grupo)]
+                self._abas[instrumento].append_rows(linhas, value_input_option="USER_ENTERED")
+                self.armazenamento.salvar_cursor_espelho(aba, max(ultimo for ultimo, _ in envios))
+                copiados += len(envios)
+                metricas.incrementar("likert_espelho_envios_total", len(envios), aba=aba)
+                if len(envios) < self.envios_por_lote:
+                    break
+                time.sleep(self.intervalo_minimo)
+        return copiados
+
+    # --- THREAD PERIÓDICA ---
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="espelho-planilha", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.sincronizar()
+            except Exception as e:
+                # Os envios continuam no SQLite; a próxima rodada tenta de novo
+                print(f"Falha ao espelhar respostas na planilha ({e}); nova tentativa em {self.intervalo:.0f}s.")
+                metricas.registrar_evento("falha_espelho_planilha", erro=str(e))
+
+
+def main():
+    import argparse
+
+    from formato import cabecalho_largo
+    from itens import carregar_instrumento
+
+    parser = argparse.ArgumentParser(description="Copia para a planilha os envios gravados no SQLite que ainda não foram copiados.")
+    parser.add_argument("--banco", default="respostas.sqlite3")
+    parser.add_argument("--credenciais", required=True, help="JSON da service account do Google")
+    parser.add_argument("--planilha", default="Respostas Formularios")
+    parser.add_argument("--formato", choices=("longo", "largo"), default="longo")
+    args = parser.parse_args()
+
+    import gspread
+
+    from conexao import ConexaoPlanilha
+
+    def abrir_cliente():
+        cliente = gspread.service_account(filename=args.credenciais)
+        cliente.set_timeout(30)  # Sem timeout, uma chamada travada nunca falharia
+        return cliente
+
+    conexao = ConexaoPlanilha(abrir_cliente, args.planilha)
+
+    def abrir_aba(nome):
+        cabecalho = cabecalho_largo(carregar_instrumento(nome).itens) if args.formato == "largo" else None
+        return conexao.aba(aba_respostas(args.formato, nome), cabecalho)
+
+    espelho = EspelhoPlanilha(ArmazenamentoSQLite(args.banco), abrir_aba, formato=args.formato)
+    print(f"{espelho.sincronizar()} envios copiados para a planilha.")
+
+
+if __name__ == "__main__":
+    main()
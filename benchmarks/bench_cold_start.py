@@ -0,0 +1,92 @@
+# bench_cold_start.py
+"""Benchmark de cold start do app_likert.py.
+
+Cada repetição roda em um processo Python novo (como após o app "acordar") e mede:
+- importacao_s: tempo para importar o Streamlit e os módulos locais do app;
+- primeira_renderizacao_s: primeira execução completa do script (até o
+  cabeçalho "Identificação" e o formulário estarem desenhados);
+- reexecucao_s: uma segunda execução, já com caches aquecidos;
+- modulos_pesados: quais módulos pesados ficaram carregados após a primeira
+  execução (devem aparecer só quando o caminho de código precisa deles).
+
+Uso:
+    python benchmarks/bench_cold_start.py [--repeticoes 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app_likert.py")
+
+MODULOS_PESADOS = ["pandas", "numpy", "matplotlib", "gspread", "google.oauth2", "pyarrow", "openpyxl"]
+
+# Código executado no processo filho; imprime um JSON com as medições
+_SONDA = r"""
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+t0 = time.perf_counter()
+import streamlit
+import fila_envio, formato, itens
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+t2 = time.perf_counter()
+at.run()
+t3 = time.perf_counter()
+titulos = [m.value for m in at.markdown]
+assert any("Identificação" in t for t in titulos), "Cabeçalho 'Identificação' não renderizado"
+pesados = [m for m in {pesados!r} if m in sys.modules]
+at.run()
+t4 = time.perf_counter()
+print(json.dumps({{
+    "importacao_s": t1 - t0,
+    "primeira_renderizacao_s": t3 - t2,
+    "reexecucao_s": t4 - t3,
+    "excecao": [str(e.value) for e in at.exception],
+    "modulos_pesados": pesados,
+}}))
+"""
+
+
+def medir_uma_vez():
+    codigo = _SONDA.format(raiz=RAIZ, app=APP, pesados=MODULOS_PESADOS)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    medicoes = [medir_uma_vez() for _ in range(args.repeticoes)]
+    resumo = {}
+    for chave in ("importacao_s", "primeira_renderizacao_s", "reexecucao_s"):
+        valores = [m[chave] for m in medicoes]
+        resumo[chave] = {"mediana": statistics.median(valores), "min": min(valores), "max": max(valores)}
+    resumo["modulos_pesados"] = sorted({m for med in medicoes for m in med["modulos_pesados"]})
+    resumo["excecoes"] = sorted({e for med in medicoes for e in med["excecao"]})
+
+    if args.json:
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Repetições: {args.repeticoes}")
+    for chave in ("importacao_s", "primeira_renderizacao_s", "reexecucao_s"):
+        r = resumo[chave]
+        print(f"{chave:<26} mediana={r['mediana'] * 1000:8.1f} ms  min={r['min'] * 1000:8.1f} ms  max={r['max'] * 1000:8.1f} ms")
+    print(f"Módulos pesados carregados: {', '.join(resumo['modulos_pesados']) or 'nenhum'}")
+    if resumo["excecoes"]:
+        print(f"Exceções no script: {resumo['excecoes']}")
+
+
+if __name__ == "__main__":
+    main()
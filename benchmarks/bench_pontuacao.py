@@ -0,0 +1,83 @@
+# bench_pontuacao.py
+"""Micro-benchmark do motor de pontuação (pontuacao.py).
+
+Gera N envios aleatórios (com ~10% de N/A) e mede:
+- matriz numérica: `pontuar_matriz` sobre uma matriz float (caminho offline típico);
+- matriz de texto: o mesmo, partindo de textos como os lidos da planilha;
+- laço por linha: a lógica antiga (linha a linha, 6 − valor nos reversos),
+  medida em uma amostra e extrapolada para N, como referência.
+
+Uso:
+    python benchmarks/bench_pontuacao.py [--envios 100000] [--repeticoes 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from itens import ITENS  # noqa: E402
+from pontuacao import esquema_de, pontuar_matriz  # noqa: E402
+
+
+def gerar_respostas(n, k, semente=42):
+    rng = np.random.default_rng(semente)
+    matriz = rng.integers(1, 6, size=(n, k)).astype(np.float64)
+    matriz[rng.random((n, k)) < 0.10] = np.nan
+    return matriz
+
+
+def pontuar_laco(matriz_texto, itens):
+    """Lógica anterior do app: uma linha e um item por vez."""
+    saida = []
+    for linha in matriz_texto:
+        pontos = []
+        for resposta, (_, _, _, reverso) in zip(linha, itens):
+            pontuacao = "N/A"
+            if resposta != "N/A":
+                valor = int(resposta)
+                pontuacao = 6 - valor if reverso == "SIM" else valor
+            pontos.append(pontuacao)
+        saida.append(pontos)
+    return saida
+
+
+def cronometrar(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envios", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--amostra-laco", type=int, default=5_000)
+    args = parser.parse_args()
+
+    esquema = esquema_de(ITENS)
+    matriz = gerar_respostas(args.envios, len(esquema.ids))
+    matriz_texto = np.where(np.isnan(matriz), "N/A", np.nan_to_num(matriz).astype(int).astype(str))
+
+    t_num = cronometrar(lambda: pontuar_matriz(matriz, esquema), args.repeticoes)
+    t_txt = cronometrar(lambda: pontuar_matriz(matriz_texto, esquema), max(1, args.repeticoes // 2))
+
+    amostra = min(args.amostra_laco, args.envios)
+    amostra_texto = matriz_texto[:amostra].tolist()
+    t_laco = cronometrar(lambda: pontuar_laco(amostra_texto, ITENS), 1) * args.envios / amostra
+
+    print(f"Envios: {args.envios:,}  Itens: {len(esquema.ids)}  Blocos: {len(esquema.blocos)}")
+    print(f"{'matriz numérica':<20} {t_num * 1000:10.1f} ms  ({args.envios / t_num:,.0f} envios/s)")
+    print(f"{'matriz de texto':<20} {t_txt * 1000:10.1f} ms  ({args.envios / t_txt:,.0f} envios/s)")
+    print(f"{'laço por linha':<20} {t_laco * 1000:10.1f} ms  (extrapolado de {amostra:,} envios; sem médias por bloco)")
+
+
+if __name__ == "__main__":
+    main()
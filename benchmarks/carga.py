@@ -0,0 +1,282 @@
+# carga.py
+"""Teste de carga do app_likert.py com muitas sessões simultâneas.
+
+Sobe o app localmente (`streamlit run`) com a aba de respostas trocada por uma
+aba em memória (planilha_fake.planilha_compartilhada, via LIKERT_PLANILHA_FAKE),
+com latência e taxa de erros 429 configuráveis, e o spool da fila e o banco de
+rascunhos numa pasta temporária; antes das sessões, o app é aquecido como o
+pinger.py faz em produção. Cada respondente simulado é um cliente do websocket do Streamlit,
+em uma thread própria, que se comporta como o navegador:
+1. carrega a página;
+2. responde os itens um a um (~10% de N/A), com uma pausa aleatória entre os
+   cliques; cada clique reexecuta só o fragmento do bloco, como no navegador;
+3. preenche o respondente e clica em "Finalizar e Enviar Respostas".
+
+Relata p50/p95/p99 do carregamento, das reexecuções e do envio, quantos 429
+foram injetados e quanto tempo a fila levou para esvaziar depois da última sessão.
+
+Uso:
+    python benchmarks/carga.py --sessoes 200 --concorrencia 200 [--latencia 0.3] [--taxa-429 0.05] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, RAIZ)
+
+from pinger import aquecer_via_websocket, iniciar_app_local, url_websocket  # noqa: E402
+
+OPCOES = ["1", "2", "3", "4", "5"]
+ROTULO_ENVIO = "Finalizar e Enviar Respostas"
+MENSAGEM_SUCESSO = "registradas com sucesso"
+
+
+class SessaoWebsocket:
+    """Uma sessão do app conduzida pelo protocolo do websocket, sem navegador."""
+
+    def __init__(self, url_base, timeout=120):
+        from websockets.sync.client import connect
+
+        self.timeout = timeout
+        # A conexão é um gerenciador de contexto (websockets ≥ 14); a pilha a fecha em fechar()
+        self._pilha = ExitStack()
+        self._ws = self._pilha.enter_context(
+            connect(url_websocket(url_base), subprotocols=["streamlit"], open_timeout=timeout, max_size=None)
+        )
+        self.estados = {}  # ID do widget → WidgetState enviado a cada execução (como faz o navegador)
+        self.widgets = {}  # ID do widget → (tipo, rótulo, fragment_id)
+        self.alertas = []  # Textos de st.success/st.error/st.warning da última execução
+        self.query_string = ""  # Atualizada pelo app (page_info_changed), como a barra de endereço
+
+    def fechar(self):
+        self._pilha.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def widget(self, chave):
+        """ID do widget criado com `key=chave` (o Streamlit acrescenta a chave ao fim do ID)."""
+        return next(i for i in self.widgets if i.endswith(f"-{chave}"))
+
+    def botao(self, rotulo):
+        return next(i for i, (tipo, r, _) in self.widgets.items() if tipo == "button" and r == rotulo)
+
+    def executar(self, fragment_id="", gatilho=None):
+        """Envia uma reexecução e espera o script terminar. Retorna a latência em segundos."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.fragment_id = fragment_id
+        estados = list(self.estados.values())
+        if gatilho is not None:
+            estados.append(WidgetState(id=gatilho, trigger_value=True))
+        msg.rerun_script.widget_states.widgets.extend(estados)
+
+        self.alertas = []
+        inicio = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        while True:
+            resposta = ForwardMsg()
+            resposta.ParseFromString(self._ws.recv(timeout=self.timeout))
+            tipo = resposta.WhichOneof("type")
+            if tipo == "delta" and resposta.delta.WhichOneof("type") == "new_element":
+                self._registrar_elemento(resposta.delta.new_element, resposta.delta.fragment_id)
+            elif tipo == "page_info_changed":
+                self.query_string = resposta.page_info_changed.query_string
+            elif tipo == "script_finished":
+                # st.rerun() dentro do fragmento encerra esta execução e já inicia a completa
+                if resposta.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    if resposta.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                        raise RuntimeError("Erro de compilação do script no servidor")
+                    return time.perf_counter() - inicio
+
+    def _registrar_elemento(self, elemento, fragment_id):
+        tipo = elemento.WhichOneof("type")
+        if tipo in ("radio", "text_input", "button"):
+            proto = getattr(elemento, tipo)
+            self.widgets[proto.id] = (tipo, proto.label, fragment_id)
+        elif tipo == "alert":
+            self.alertas.append(elemento.alert.body)
+        elif tipo == "exception":
+            raise RuntimeError(f"Exceção no app: {elemento.exception.message}")
+
+    def definir_texto(self, widget_id, valor):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        self.estados[widget_id] = WidgetState(id=widget_id, string_value=valor)
+
+
+def percentis(valores):
+    """p50/p95/p99, média e máximo (em segundos) de uma lista de latências."""
+    if not valores:
+        return None
+    if len(valores) == 1:
+        p50 = p95 = p99 = valores[0]
+    else:
+        cortes = statistics.quantiles(valores, n=100, method="inclusive")
+        p50, p95, p99 = cortes[49], cortes[94], cortes[98]
+    return {
+        "n": len(valores), "p50": p50, "p95": p95, "p99": p99,
+        "media": statistics.fmean(valores), "max": max(valores),
+    }
+
+
+def simular_sessao(url, indice, itens, itens_por_sessao, pausa, semente):
+    """Percorre o questionário em uma sessão; retorna as latências medidas."""
+    rng = random.Random(semente + indice)
+    resultado = {"carregamento": None, "reexecucoes": [], "envio": None, "erro": None}
+    try:
+        with SessaoWebsocket(url) as sessao:
+            resultado["carregamento"] = sessao.executar()
+
+            for item_id in rng.sample(itens, itens_por_sessao):
+                if pausa:
+                    time.sleep(rng.expovariate(1 / pausa))
+                radio = sessao.widget(f"radio_{item_id}")
+                valor = "N/A" if rng.random() < 0.10 else rng.choice(OPCOES)
+                sessao.definir_texto(radio, valor)
+                resultado["reexecucoes"].append(sessao.executar(fragment_id=sessao.widgets[radio][2]))
+
+            sessao.definir_texto(sessao.widget("input_respondente"), f"Carga {indice}")
+            resultado["envio"] = sessao.executar(gatilho=sessao.botao(ROTULO_ENVIO))
+            if not any(MENSAGEM_SUCESSO in texto for texto in sessao.alertas):
+                raise RuntimeError("Mensagem de sucesso não exibida: " + "; ".join(sessao.alertas))
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+    return resultado
+
+
+def pendentes_no_spool(caminho):
+    """(envios, linhas) ainda não gravados na planilha, lidos direto do spool da fila."""
+    if not os.path.exists(caminho):
+        return 0, 0
+    with sqlite3.connect(caminho, timeout=30) as conn:
+        return conn.execute("SELECT COUNT(*), COALESCE(SUM(num_linhas), 0) FROM envios").fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessoes", type=int, default=200, help="Total de respondentes simulados")
+    parser.add_argument("--concorrencia", type=int, default=200, help="Sessões ativas ao mesmo tempo")
+    parser.add_argument("--itens-por-sessao", type=int, default=48, help="Itens respondidos por sessão (mín. 50%% válidos)")
+    parser.add_argument("--pausa", type=float, default=0.5, help="Pausa média entre cliques (s, exponencial)")
+    parser.add_argument("--latencia", type=float, default=0.3, help="Latência de cada chamada à aba fake (s)")
+    parser.add_argument("--taxa-429", type=float, default=0.05, help="Probabilidade de cada chamada falhar com 429")
+    parser.add_argument("--espera-fila", type=float, default=300.0, help="Tempo máximo esperando a fila esvaziar (s)")
+    parser.add_argument("--porta", type=int, default=8598)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    from itens import ITENS
+
+    ids = [item_id for _, item_id, _, _ in ITENS]
+    itens_por_sessao = min(args.itens_por_sessao, len(ids))
+
+    pasta = tempfile.mkdtemp(prefix="likert-carga-")
+    spool = os.path.join(pasta, "spool_envios.sqlite3")
+    caminho_log = os.path.join(pasta, "servidor.log")
+    ambiente = dict(
+        os.environ,
+        LIKERT_PLANILHA_FAKE="1",
+        LIKERT_FAKE_LATENCIA=str(args.latencia),
+        LIKERT_FAKE_TAXA_429=str(args.taxa_429),
+        LIKERT_SPOOL=spool,
+        LIKERT_RASCUNHOS=os.path.join(pasta, "rascunhos.sqlite3"),
+    )
+
+    with open(caminho_log, "w") as log:
+        processo, url = iniciar_app_local(args.porta, ambiente=ambiente, saida=log)
+        try:
+            aquecer_via_websocket(url)
+            concluidas = 0
+            lock = threading.Lock()
+
+            def executar(indice):
+                nonlocal concluidas
+                resultado = simular_sessao(url, indice, ids, itens_por_sessao, args.pausa, args.semente)
+                with lock:
+                    concluidas += 1
+                    if not args.json and concluidas % max(1, args.sessoes // 10) == 0:
+                        print(f"{concluidas}/{args.sessoes} sessões concluídas", file=sys.stderr)
+                return resultado
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+                resultados = list(executor.map(executar, range(args.sessoes)))
+            duracao_sessoes = time.perf_counter() - inicio
+
+            # A thread da fila continua gravando na aba fake depois que as sessões terminam
+            limite = time.monotonic() + args.espera_fila
+            while pendentes_no_spool(spool)[0] and time.monotonic() < limite:
+                time.sleep(0.2)
+            duracao_fila = time.perf_counter() - inicio - duracao_sessoes
+            envios_pendentes, linhas_pendentes = pendentes_no_spool(spool)
+        finally:
+            processo.terminate()
+            processo.wait()
+
+    with open(caminho_log, encoding="utf-8", errors="replace") as log:
+        erros_429 = sum(1 for linha in log if '"falha_envio_planilha"' in linha and '"status": 429' in linha)
+
+    erros = [r["erro"] for r in resultados if r["erro"]]
+    resumo = {
+        "sessoes": args.sessoes,
+        "concorrencia": args.concorrencia,
+        "itens_por_sessao": itens_por_sessao,
+        "duracao_sessoes_s": duracao_sessoes,
+        "envios_por_s": (args.sessoes - len(erros)) / duracao_sessoes,
+        "carregamento_s": percentis([r["carregamento"] for r in resultados if r["carregamento"] is not None]),
+        "reexecucao_s": percentis([t for r in resultados for t in r["reexecucoes"]]),
+        "envio_s": percentis([r["envio"] for r in resultados if r["envio"] is not None]),
+        "fila": {
+            "erros_429": erros_429,
+            "envios_pendentes": envios_pendentes,
+            "linhas_pendentes": linhas_pendentes,
+            "tempo_para_esvaziar_s": duracao_fila,
+        },
+        "erros": len(erros),
+        "exemplos_erro": sorted(set(erros))[:5],
+        "log_servidor": caminho_log,
+    }
+
+    if args.json:
+        print(json.dumps(resumo, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{args.sessoes} sessões ({args.concorrencia} simultâneas, {itens_por_sessao} itens cada) em {duracao_sessoes:.1f}s")
+    for rotulo, chave in (("Carregamento", "carregamento_s"), ("Reexecução", "reexecucao_s"), ("Envio", "envio_s")):
+        p = resumo[chave]
+        if p:
+            print(
+                f"  {rotulo:<13} n={p['n']:>6}  p50={p['p50'] * 1000:8.1f} ms  "
+                f"p95={p['p95'] * 1000:8.1f} ms  p99={p['p99'] * 1000:8.1f} ms  max={p['max'] * 1000:8.1f} ms"
+            )
+    fila = resumo["fila"]
+    situacao = "esvaziou" if not fila["envios_pendentes"] else f"ainda com {fila['envios_pendentes']} envios pendentes"
+    print(f"  Fila: {situacao} {fila['tempo_para_esvaziar_s']:.1f}s após a última sessão; {fila['erros_429']} erros 429 injetados")
+    if erros:
+        print(f"  {len(erros)} sessões com erro, por exemplo: {resumo['exemplos_erro'][0]}")
+    print(f"  Log do servidor: {caminho_log}")
+
+
+if __name__ == "__main__":
+    main()
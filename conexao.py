@@ -0,0 +1,249 @@
+# conexao.py
+"""Conexão gerenciada com o Google Sheets, compartilhada por todas as sessões.
+
+`ConexaoPlanilha` abre o cliente autorizado uma única vez e guarda os objetos
+das abas. Toda chamada à API passa por `executar`, que:
+- revalida a aba com uma consulta barata (metadados da planilha) se ela não é
+  usada há mais de `intervalo_verificacao` segundos;
+- em erro de autenticação (token expirado, 401), descarta cliente e abas,
+  reconecta e repete a chamada uma vez;
+- em erro de rede ou 5xx, descarta a aba (a próxima chamada reabre) e conta
+  a falha no disjuntor.
+
+O disjuntor (`Disjuntor`) abre depois de `limiar_falhas` falhas seguidas: por
+`tempo_abertura` segundos as chamadas falham na hora com `CircuitoAberto`, sem
+esperar timeouts; depois, uma única chamada de teste (meio-aberto) decide se
+ele volta a fechar. Erros em que a API respondeu (429, 400, 403) não contam
+como indisponibilidade, nem erros que não vêm da API.
+
+`aba(nome)` devolve um `AbaGerenciada`, que tem a mesma interface usada de um
+gspread.Worksheet e pode ser passado à fila de envio no lugar dele.
+"""
+import threading
+import time
+
+import metricas
+
+FECHADO, MEIO_ABERTO, ABERTO = "fechado", "meio_aberto", "aberto"
+
+# Falhas que indicam credencial vencida ou revogada
+_ERROS_AUTENTICACAO = ("RefreshError",)
+# Falhas de transporte (sem resposta da API)
+_ERROS_REDE = ("TransportError",)
+
+
+class CircuitoAberto(Exception):
+    """A planilha está indisponível e o disjuntor recusou a chamada sem tentá-la."""
+
+
+def classificar_erro(erro):
+    """Tipo da falha: "autenticacao", "indisponivel" ou "resposta" (a API respondeu com um erro)."""
+    status = getattr(getattr(erro, "response", None), "status_code", None)
+    nome = type(erro).__name__
+    if status == 401 or nome in _ERROS_AUTENTICACAO:
+        return "autenticacao"
+    if (status is not None and status >= 500) or nome in _ERROS_REDE or isinstance(erro, OSError):
+        return "indisponivel"
+    return "resposta"
+
+
+class Disjuntor:
+    """Disjuntor fechado → aberto → meio-aberto, seguro para uso entre threads."""
+
+    def __init__(self, limiar_falhas=5, tempo_abertura=30.0, relogio=time.monotonic):
+        self.limiar_falhas = limiar_falhas
+        self.tempo_abertura = tempo_abertura
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self.estado = FECHADO
+        self.falhas_seguidas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+
+    def permitir(self):
+        """Levanta CircuitoAberto se a chamada não deve ser tentada agora."""
+        with self._lock:
+            if self.estado == ABERTO:
+                restante = self._aberto_em + self.tempo_abertura - self._relogio()
+                if restante > 0:
+                    raise CircuitoAberto(f"Planilha indisponível; nova tentativa em {restante:.0f}s.")
+                self.estado = MEIO_ABERTO
+                self._teste_em_andamento = False
+            if self.estado == MEIO_ABERTO:
+                if self._teste_em_andamento:
+                    raise CircuitoAberto("Planilha indisponível; chamada de teste em andamento.")
+                self._teste_em_andamento = True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            if self.estado != FECHADO:
+                metricas.registrar_evento("circuito_fechado", falhas_seguidas=self.falhas_seguidas)
+            self.estado = FECHADO
+            self.falhas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            self._teste_em_andamento = False
+            if self.estado == MEIO_ABERTO or self.falhas_seguidas >= self.limiar_falhas:
+                if self.estado != ABERTO:
+                    metricas.incrementar("likert_sheets_circuito_aberturas_total")
+                    metricas.registrar_evento("circuito_aberto", falhas_seguidas=self.falhas_seguidas)
+                self.estado = ABERTO
+                self._aberto_em = self._relogio()
+
+
+class ConexaoPlanilha:
+    """Cliente e abas reaproveitados entre sessões, com reconexão e disjuntor."""
+
+    def __init__(
+        self,
+        abrir_cliente,
+        nome_planilha="Respostas Formularios",
+        intervalo_verificacao=300.0,
+        limiar_falhas=5,
+        tempo_abertura=30.0,
+        relogio=time.monotonic,
+    ):
+        self._abrir_cliente = abrir_cliente  # Função sem argumentos → cliente autorizado (gspread.Client)
+        self.nome_planilha = nome_planilha
+        self.intervalo_verificacao = intervalo_verificacao
+        self._relogio = relogio
+        self.disjuntor = Disjuntor(limiar_falhas, tempo_abertura, relogio)
+
+        self._lock = threading.RLock()
+        self._cliente = None
+        self._documento = None
+        self._abas = {}  # nome → [worksheet, último uso bem-sucedido]
+        self._cabecalhos = {}  # nome → cabeçalho a garantir ao abrir a aba
+        self.reconexoes = 0
+
+    # --- ABERTURA ---
+    # As chamadas de rede acontecem fora do lock: uma chamada lenta (ou que só
+    # falha no timeout do cliente) não bloqueia as outras abas nem `verificar`.
+    # Se duas threads abrirem o mesmo objeto ao mesmo tempo, fica o primeiro publicado.
+    def _obter_documento(self):
+        with self._lock:
+            cliente, documento = self._cliente, self._documento
+        if cliente is None:
+            with metricas.cronometrar("likert_sheets_conexao_segundos"):
+                cliente = self._abrir_cliente()
+            documento = None
+        if documento is None:
+            documento = cliente.open(self.nome_planilha)
+            with self._lock:
+                if self._documento is None:
+                    self._cliente, self._documento = cliente, documento
+                documento = self._documento
+        return documento
+
+    def _obter_aba(self, nome):
+        with self._lock:
+            registro = self._abas.get(nome)
+            documento = self._documento
+            parada = registro is not None and self._relogio() - registro[1] > self.intervalo_verificacao
+        if parada and documento is None:
+            registro = None  # A conexão foi descartada por outra thread: reabre
+        elif parada:
+            # Aba parada há muito tempo: confirma que a conexão ainda vale antes de usá-la
+            try:
+                documento.fetch_sheet_metadata()
+                with self._lock:
+                    registro[1] = self._relogio()
+            except Exception as e:
+                if classificar_erro(e) == "resposta":
+                    raise
+                self._descartar(nome, "verificacao", descartar_cliente=classificar_erro(e) == "autenticacao")
+                registro = None
+        if registro is None:
+            ws = self._obter_documento().worksheet(nome)
+            cabecalho = self._cabecalhos.get(nome)
+            if cabecalho:
+                from formato import garantir_cabecalho
+                garantir_cabecalho(ws, list(cabecalho))
+            with self._lock:
+                registro = self._abas.setdefault(nome, [ws, self._relogio()])
+        return registro[0]
+
+    def _descartar(self, nome, motivo, descartar_cliente=False):
+        with self._lock:
+            self._abas.pop(nome, None)
+            if descartar_cliente:
+                self._cliente = self._documento = None
+                self._abas.clear()
+            self.reconexoes += 1
+        metricas.incrementar("likert_sheets_reconexoes_total", motivo=motivo)
+
+    # --- API ---
+    def aba(self, nome, cabecalho=None):
+        """Aba gerenciada `nome`; se `cabecalho` for informado, ele é gravado numa aba vazia ao abrir."""
+        if cabecalho:
+            self._cabecalhos[nome] = tuple(cabecalho)
+        return AbaGerenciada(self, nome)
+
+    def executar(self, nome_aba, metodo, *args, **kwargs):
+        """Chama `worksheet.<metodo>(*args, **kwargs)` na aba, com reconexão e disjuntor."""
+        self.disjuntor.permitir()
+        for tentativa in (1, 2):
+            try:
+                resultado = getattr(self._obter_aba(nome_aba), metodo)(*args, **kwargs)
+            except Exception as e:
+                tipo = classificar_erro(e)
+                if tipo == "resposta":
+                    self.disjuntor.registrar_sucesso()  # A API respondeu: não é indisponibilidade
+                    raise
+                if tipo == "autenticacao" and tentativa == 1:
+                    self._descartar(nome_aba, "autenticacao", descartar_cliente=True)
+                    continue  # Credencial renovada: repete a chamada uma vez
+                self._descartar(nome_aba, tipo)
+                self.disjuntor.registrar_falha()
+                raise
+            with self._lock:
+                if nome_aba in self._abas:
+                    self._abas[nome_aba][1] = self._relogio()
+            self.disjuntor.registrar_sucesso()
+            return resultado
+
+    def verificar(self, nome_aba):
+        """Health check: abre (ou revalida) a aba e consulta os metadados da planilha."""
+        self.disjuntor.permitir()
+        try:
+            self._obter_aba(nome_aba)
+            self._obter_documento().fetch_sheet_metadata()
+        except Exception as e:
+            if classificar_erro(e) == "resposta":
+                self.disjuntor.registrar_sucesso()
+            else:
+                self._descartar(nome_aba, "verificacao", descartar_cliente=classificar_erro(e) == "autenticacao")
+                self.disjuntor.registrar_falha()
+            raise
+        self.disjuntor.registrar_sucesso()
+        return True
+
+    def estado(self):
+        with self._lock:
+            return {
+                "circuito": self.disjuntor.estado,
+                "falhas_seguidas": self.disjuntor.falhas_seguidas,
+                "conectado": self._cliente is not None,
+                "abas_abertas": sorted(self._abas),
+                "reconexoes": self.reconexoes,
+            }
+
+
+class AbaGerenciada:
+    """Interface de gspread.Worksheet cujas chamadas passam pela `ConexaoPlanilha`."""
+
+    def __init__(self, conexao, nome):
+        self._conexao = conexao
+        self.title = nome
+
+    def append_rows(self, values, **kwargs):
+        return self._conexao.executar(self.title, "append_rows", values, **kwargs)
+
+    def get_values(self, range_name=None, **kwargs):
+        return self._conexao.executar(self.title, "get_values", range_name, **kwargs)
+
+    def row_values(self, row, **kwargs):
+        return self._conexao.executar(self.title, "row_values", row, **kwargs)
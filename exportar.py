@@ -0,0 +1,238 @@
+# exportar.py
+"""Exportação em streaming da aba de respostas para Parquet, CSV ou XLSX.
+
+A aba é lida em intervalos de linhas limitados (`get_values("A{ini}:I{fim}")`),
+cada intervalo vira um DataFrame e é gravado na saída antes do próximo ser
+lido, de modo que a memória usada não depende do tamanho da planilha.
+
+Um arquivo de estado (`<saida>.estado.json`) guarda a última linha exportada;
+uma nova execução continua dali. Para Parquet e XLSX, cada execução grava um
+arquivo novo (Parquet: `<saida>/parte-<linha inicial>.parquet`; XLSX:
+`<saida sem extensão>-<linha inicial>.xlsx`), já que esses formatos não aceitam
+anexar dados a um arquivo existente. Com `--recomecar`, o CSV é reescrito e
+as partes Parquet/XLSX anteriores da mesma saída são apagadas. Os valores são
+exportados como texto, exatamente como a planilha os devolve.
+
+Uso:
+    python exportar.py --credenciais conta.json --formato parquet --saida likert_parquet
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+from formato import CABECALHO_LONGO, letra_coluna
+
+FORMATOS_EXPORTACAO = ("parquet", "csv", "xlsx")
+LIMITE_LINHAS_XLSX = 1_048_575  # Linhas por aba no Excel, descontando o cabeçalho
+
+
+def detectar_cabecalho(planilha):
+    """Cabeçalho da aba e primeira linha de dados.
+
+    Se a linha 1 parece um cabeçalho (não começa com um timestamp), ela é usada;
+    senão a aba não tem cabeçalho e vale o do formato longo.
+    """
+    primeira = planilha.row_values(1)
+    if primeira and not str(primeira[0])[:1].isdigit():
+        return primeira, 2
+    return list(CABECALHO_LONGO), 1
+
+
+def ler_em_blocos(planilha, cabecalho, linha_inicial, linhas_por_bloco=5000):
+    """Gera (DataFrame, última linha lida) para cada intervalo de linhas da aba."""
+    import pandas as pd
+
+    ultima_coluna = letra_coluna(len(cabecalho))
+    inicio = linha_inicial
+    while True:
+        fim = inicio + linhas_por_bloco - 1
+        linhas = planilha.get_values(f"A{inicio}:{ultima_coluna}{fim}")
+        if not linhas:
+            return
+        # A API omite células vazias no fim da linha: completa até a largura do cabeçalho
+        largura = len(cabecalho)
+        linhas = [linha + [""] * (largura - len(linha)) for linha in linhas]
+        yield pd.DataFrame(linhas, columns=cabecalho, dtype="string"), inicio + len(linhas) - 1
+        if len(linhas) < linhas_por_bloco:
+            return
+        inicio += len(linhas)
+
+
+# --- GRAVADORES ---
+class _GravadorCSV:
+    # Cada bloco é gravado e descarregado no disco: o estado pode avançar a cada bloco
+    duravel_por_bloco = True
+
+    def __init__(self, saida, linha_inicial, recomecar=False):
+        novo = recomecar or not os.path.exists(saida) or os.path.getsize(saida) == 0
+        self._arquivo = open(saida, "w" if recomecar else "a", newline="", encoding="utf-8")
+        self._escrever_cabecalho = novo
+        self.destino = saida
+
+    def escrever(self, df):
+        df.to_csv(self._arquivo, header=self._escrever_cabecalho, index=False, quoting=csv.QUOTE_MINIMAL)
+        self._escrever_cabecalho = False
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class _GravadorParquet:
+    duravel_por_bloco = False  # O arquivo só fica legível depois de fechado
+
+    def __init__(self, saida, linha_inicial, recomecar=False):
+        os.makedirs(saida, exist_ok=True)
+        if recomecar:
+            _apagar_partes(os.path.join(saida, "parte-*.parquet"))
+        self.destino = os.path.join(saida, f"parte-{linha_inicial:09d}.parquet")
+        self._escritor = None
+
+    def escrever(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if self._escritor is None:
+            self._escritor = pq.ParquetWriter(self.destino, tabela.schema)
+        self._escritor.write_table(tabela)  # Um row group por bloco
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+class _GravadorXLSX:
+    duravel_por_bloco = False
+
+    def __init__(self, saida, linha_inicial, recomecar=False):
+        from openpyxl import Workbook
+
+        raiz, _ = os.path.splitext(saida)
+        if recomecar:
+            _apagar_partes(f"{glob.escape(raiz)}-{'[0-9]' * 9}.xlsx")
+        self.destino = f"{raiz}-{linha_inicial:09d}.xlsx"
+        self._livro = Workbook(write_only=True)  # Grava linhas em streaming
+        self._aba = None
+        self._linhas_na_aba = 0
+
+    def escrever(self, df):
+        for linha in df.itertuples(index=False, name=None):
+            if self._aba is None or self._linhas_na_aba >= LIMITE_LINHAS_XLSX:
+                self._aba = self._livro.create_sheet(f"Likert {len(self._livro.worksheets) + 1}")
+                self._aba.append(list(df.columns))
+                self._linhas_na_aba = 0
+            self._aba.append([v if isinstance(v, str) else "" for v in linha])
+            self._linhas_na_aba += 1
+
+    def fechar(self):
+        if self._aba is not None:
+            self._livro.save(self.destino)
+
+
+def _apagar_partes(padrao):
+    """Remove as partes de uma exportação anterior, para o recomeço não duplicar linhas."""
+    for caminho in glob.glob(padrao):
+        os.remove(caminho)
+
+
+GRAVADORES = {"csv": _GravadorCSV, "parquet": _GravadorParquet, "xlsx": _GravadorXLSX}
+
+
+# --- ESTADO (RETOMADA) ---
+def _caminho_estado(saida):
+    return f"{saida.rstrip(os.sep)}.estado.json"
+
+
+def ler_estado(saida):
+    try:
+        with open(_caminho_estado(saida), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _salvar_estado(saida, estado):
+    temporario = _caminho_estado(saida) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(temporario, _caminho_estado(saida))  # Troca atômica
+
+
+def exportar(planilha, saida, formato="parquet", linhas_por_bloco=5000, recomecar=False, progresso=None):
+    """Exporta a aba para `saida`, retomando da última linha exportada.
+
+    `progresso`, se informado, é chamado a cada bloco com (linhas exportadas, linhas/s).
+    Retorna um dicionário com linhas exportadas, duração, linhas/s e arquivo gerado.
+    """
+    if formato not in GRAVADORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r}")
+
+    cabecalho, primeira_linha_dados = detectar_cabecalho(planilha)
+    estado = None if recomecar else ler_estado(saida)
+    linha_inicial = estado["ultima_linha"] + 1 if estado else primeira_linha_dados
+    total_anterior = estado["linhas_exportadas"] if estado else 0
+
+    if recomecar and os.path.exists(_caminho_estado(saida)):
+        os.remove(_caminho_estado(saida))
+    gravador = GRAVADORES[formato](saida, linha_inicial, recomecar)
+    exportadas = 0
+    ultima_linha = linha_inicial - 1
+    inicio = time.perf_counter()
+    try:
+        for df, ultima_linha_bloco in ler_em_blocos(planilha, cabecalho, linha_inicial, linhas_por_bloco):
+            gravador.escrever(df)
+            exportadas += len(df)
+            ultima_linha = ultima_linha_bloco
+            if gravador.duravel_por_bloco:
+                _salvar_estado(saida, {"ultima_linha": ultima_linha, "linhas_exportadas": total_anterior + exportadas})
+            if progresso is not None:
+                progresso(exportadas, exportadas / max(time.perf_counter() - inicio, 1e-9))
+    finally:
+        # Fecha o arquivo mesmo em caso de erro: o que já foi gravado fica válido
+        gravador.fechar()
+        if exportadas:
+            _salvar_estado(saida, {"ultima_linha": ultima_linha, "linhas_exportadas": total_anterior + exportadas})
+
+    duracao = time.perf_counter() - inicio
+    return {
+        "linhas_exportadas": exportadas,
+        "ultima_linha": ultima_linha,
+        "duracao_s": duracao,
+        "linhas_por_s": exportadas / duracao if duracao else 0.0,
+        "arquivo": gravador.destino if exportadas else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta a aba de respostas em blocos, sem carregar a planilha inteira.")
+    parser.add_argument("--credenciais", required=True, help="JSON da service account do Google")
+    parser.add_argument("--planilha", default="Respostas Formularios")
+    parser.add_argument("--aba", default="Likert")
+    parser.add_argument("--formato", choices=FORMATOS_EXPORTACAO, default="parquet")
+    parser.add_argument("--saida", required=True, help="Arquivo (CSV/XLSX) ou pasta (Parquet) de destino")
+    parser.add_argument("--linhas-por-bloco", type=int, default=5000)
+    parser.add_argument("--recomecar", action="store_true", help="Ignora o estado salvo e exporta desde o início")
+    args = parser.parse_args()
+
+    import gspread
+
+    ws = gspread.service_account(filename=args.credenciais).open(args.planilha).worksheet(args.aba)
+    resultado = exportar(
+        ws, args.saida, args.formato, args.linhas_por_bloco, args.recomecar,
+        progresso=lambda n, taxa: print(f"{n} linhas exportadas ({taxa:,.0f} linhas/s)"),
+    )
+    print(
+        f"Concluído: {resultado['linhas_exportadas']} linhas em {resultado['duracao_s']:.1f}s "
+        f"({resultado['linhas_por_s']:,.0f} linhas/s); última linha: {resultado['ultima_linha']}."
+    )
+    if resultado["arquivo"]:
+        print(f"Arquivo gerado: {resultado['arquivo']}")
+
+
+if __name__ == "__main__":
+    main()
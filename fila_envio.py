@@ -0,0 +1,334 @@
+# fila_envio.py
+"""Fila de envio assíncrona (write-behind) para a aba de respostas.
+
+Cada envio do questionário é gravado primeiro em um spool SQLite local e a
+sessão do respondente é liberada imediatamente. Uma única thread por processo
+agrupa os envios pendentes em chamadas `append_rows`, respeitando um intervalo
+mínimo entre chamadas e aplicando backoff exponencial quando a API recusa
+(por exemplo, erro 429 de cota excedida).
+
+Quando a API recusa o conteúdo do lote (erro 4xx que não é de cota nem de
+credencial, ex.: célula com mais de 50 mil caracteres), repetir não adianta:
+o lote é dividido ao meio até isolar o envio recusado, que vai para a tabela
+`envios_rejeitados` do spool, e os demais seguem para a planilha.
+`reenviar_rejeitados()` devolve os rejeitados à fila depois de corrigida a causa;
+fora do app, pela linha de comando (a fila do app os envia em até 30 s):
+
+    python fila_envio.py --spool spool_envios.sqlite3 [--aba "Likert"] [--reenviar]
+
+A planilha pode ser passada já aberta ou como uma função sem argumentos que
+abre a conexão; nesse caso ela só é chamada no primeiro envio (ou em
+`conectar()`), fora da thread que renderiza a página.
+
+Cada envio guarda no spool a aba de destino (`aba`, por padrão o título da
+planilha), e a fila só envia os seus: duas filas apontadas para o mesmo arquivo
+não gravam linhas uma na aba da outra. Envios de versões anteriores, sem aba
+registrada, são enviados por qualquer fila que use o arquivo.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+
+import metricas
+
+# Recusas 4xx que se resolvem sozinhas ou não dependem do conteúdo do lote
+# (403 também é usado pela API para limite de taxa)
+STATUS_TRANSITORIOS = (401, 403, 408, 429)
+
+
+class FilaEnvio:
+    """Fila durável compartilhada por todas as sessões do processo."""
+
+    def __init__(
+        self,
+        planilha,
+        caminho_spool="spool_envios.sqlite3",
+        linhas_por_lote=1000,
+        intervalo_minimo=1.1,
+        backoff_inicial=2.0,
+        backoff_maximo=64.0,
+        iniciar=True,
+        aba=None,
+    ):
+        if hasattr(planilha, "append_rows"):
+            self.planilha, self._abrir_planilha = planilha, None
+        else:
+            self.planilha, self._abrir_planilha = None, planilha
+        self.aba = aba if aba is not None else getattr(planilha, "title", None)
+        # Filtro dos envios desta fila (None: todos, como antes de a aba ser registrada)
+        self._filtro = "(aba = ? OR aba IS NULL)" if self.aba is not None else "(? IS NULL)"
+        self._lock_conexao = threading.Lock()
+        self.caminho_spool = caminho_spool
+        self.linhas_por_lote = linhas_por_lote
+        self.intervalo_minimo = intervalo_minimo  # Segundos entre chamadas à API
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+
+        self._lock = threading.Lock()
+        self._condicao = threading.Condition(self._lock)
+        self._parar = False
+        self._thread = None
+        self._ultima_chamada = 0.0
+
+        # Estatísticas expostas em `estatisticas()`
+        self._envios_concluidos = 0
+        self._linhas_enviadas = 0
+        self._lotes_enviados = 0
+        self._falhas = 0
+        self._ultimo_erro = None
+        self._ultima_latencia = None
+        self._soma_latencias = 0.0
+        self._ultimo_atraso = None
+
+        # Divisão do lote depois de uma recusa: até o envio `_isolar_ate`, no máximo `_max_envios` por lote
+        self._isolar_ate = None
+        self._max_envios = None
+
+        self._conn = sqlite3.connect(caminho_spool, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS envios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                criado_em REAL NOT NULL,
+                num_linhas INTEGER NOT NULL,
+                linhas TEXT NOT NULL,
+                aba TEXT
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS envios_rejeitados (
+                id INTEGER PRIMARY KEY,
+                criado_em REAL NOT NULL,
+                num_linhas INTEGER NOT NULL,
+                linhas TEXT NOT NULL,
+                rejeitado_em REAL NOT NULL,
+                erro TEXT,
+                aba TEXT
+            )"""
+        )
+        for tabela in ("envios", "envios_rejeitados"):
+            # Spool criado antes de a aba de destino ser registrada
+            if "aba" not in [coluna[1] for coluna in self._conn.execute(f"PRAGMA table_info({tabela})")]:
+                self._conn.execute(f"ALTER TABLE {tabela} ADD COLUMN aba TEXT")
+
+        if iniciar:
+            self.iniciar()
+
+    # --- API USADA PELO APP ---
+    def enfileirar(self, linhas):
+        """Grava um envio no spool e retorna sem esperar a planilha."""
+        linhas = [list(linha) for linha in linhas]
+        if not linhas:
+            return
+        carga = json.dumps(linhas, ensure_ascii=False, default=str)
+        with self._condicao:
+            self._conn.execute(
+                "INSERT INTO envios (criado_em, num_linhas, linhas, aba) VALUES (?, ?, ?, ?)",
+                (time.time(), len(linhas), carga, self.aba),
+            )
+            self._condicao.notify()
+
+    def estatisticas(self):
+        """Profundidade da fila e latências de envio, para monitoramento."""
+        with self._lock:
+            pendentes, linhas_pendentes, mais_antigo = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(num_linhas), 0), MIN(criado_em) FROM envios WHERE {self._filtro}",
+                (self.aba,),
+            ).fetchone()
+            (rejeitados,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM envios_rejeitados WHERE {self._filtro}", (self.aba,)
+            ).fetchone()
+            return {
+                "envios_pendentes": pendentes,
+                "linhas_pendentes": linhas_pendentes,
+                "idade_mais_antigo_s": (time.time() - mais_antigo) if mais_antigo else 0.0,
+                "envios_concluidos": self._envios_concluidos,
+                "linhas_enviadas": self._linhas_enviadas,
+                "lotes_enviados": self._lotes_enviados,
+                "falhas": self._falhas,
+                "ultimo_erro": self._ultimo_erro,
+                "ultima_latencia_s": self._ultima_latencia,
+                "latencia_media_s": (self._soma_latencias / self._lotes_enviados) if self._lotes_enviados else None,
+                "ultimo_atraso_fila_s": self._ultimo_atraso,
+                "envios_rejeitados": rejeitados,
+            }
+
+    def rejeitados(self):
+        """Envios recusados pela planilha: [(id, aba, num_linhas, rejeitado_em, erro), ...]."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, aba, num_linhas, rejeitado_em, erro FROM envios_rejeitados WHERE {self._filtro} ORDER BY id",
+                (self.aba,),
+            ).fetchall()
+
+    def reenviar_rejeitados(self):
+        """Devolve à fila os envios rejeitados (ex.: depois de corrigir a aba). Retorna quantos."""
+        with self._condicao:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                cursor = self._conn.execute(
+                    "INSERT INTO envios (criado_em, num_linhas, linhas, aba) "
+                    f"SELECT criado_em, num_linhas, linhas, aba FROM envios_rejeitados WHERE {self._filtro} ORDER BY id",
+                    (self.aba,),
+                )
+                self._conn.execute(f"DELETE FROM envios_rejeitados WHERE {self._filtro}", (self.aba,))
+            self._condicao.notify()
+        return cursor.rowcount
+
+    def conectar(self):
+        """Abre a conexão com a planilha, se ainda não estiver aberta, e a retorna."""
+        with self._lock_conexao:
+            if self.planilha is None:
+                self.planilha = self._abrir_planilha()
+            return self.planilha
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar = False
+        self._thread = threading.Thread(target=self._executar, name="fila-envio", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout=None):
+        """Sinaliza a thread para encerrar; o que restar no spool fica para a próxima execução."""
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def esvaziar(self, timeout=30.0):
+        """Bloqueia até o spool ficar vazio (ou o tempo acabar). Retorna True se esvaziou."""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self.estatisticas()["envios_pendentes"] == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+    # --- THREAD DE ENVIO ---
+    def _pendente(self):
+        return self._conn.execute(f"SELECT 1 FROM envios WHERE {self._filtro} LIMIT 1", (self.aba,)).fetchone()
+
+    def _proximo_lote(self):
+        """Seleciona envios inteiros, na ordem de chegada, até o limite de linhas do lote."""
+        ids, linhas, criados = [], [], []
+        for id_envio, criado_em, num_linhas, carga in self._conn.execute(
+            f"SELECT id, criado_em, num_linhas, linhas FROM envios WHERE {self._filtro} ORDER BY id", (self.aba,)
+        ):
+            if ids and len(linhas) + num_linhas > self.linhas_por_lote:
+                break
+            if self._isolar_ate is not None:
+                if not ids and id_envio > self._isolar_ate:
+                    self._isolar_ate = self._max_envios = None  # A parte recusada já foi resolvida
+                elif ids and (id_envio > self._isolar_ate or len(ids) >= self._max_envios):
+                    break
+            ids.append(id_envio)
+            criados.append(criado_em)
+            linhas.extend(json.loads(carga))
+        return ids, linhas, criados
+
+    def _executar(self):
+        espera_erro = 0.0
+        while True:
+            with self._condicao:
+                while not self._parar and self._pendente() is None:
+                    # Acorda de tempos em tempos: envios devolvidos por outro processo (CLI) não notificam
+                    self._condicao.wait(timeout=30.0)
+                if self._parar:
+                    return
+                ids, linhas, criados = self._proximo_lote()
+
+            # Limite de taxa: garante um intervalo mínimo entre chamadas à API
+            atraso = self._ultima_chamada + max(self.intervalo_minimo, espera_erro) - time.monotonic()
+            if atraso > 0 and self._aguardar(atraso):
+                return
+
+            self._ultima_chamada = time.monotonic()
+            try:
+                planilha = self.conectar()
+                inicio = time.monotonic()
+                planilha.append_rows(linhas, value_input_option="USER_ENTERED")
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                metricas.incrementar("likert_sheets_append_erros_total", status=str(status or type(e).__name__))
+                if status is not None and 400 <= status < 500 and status not in STATUS_TRANSITORIOS:
+                    self._recusado(ids, e)
+                    continue
+                # Backoff exponencial com jitter; os envios continuam no spool
+                espera_erro = min(self.backoff_maximo, (espera_erro * 2) or self.backoff_inicial)
+                espera_erro *= random.uniform(0.8, 1.2)
+                with self._lock:
+                    self._falhas += 1
+                    self._ultimo_erro = f"{type(e).__name__}: {e}"
+                metricas.registrar_evento("falha_envio_planilha", erro=str(e), status=status, lote_linhas=len(linhas))
+                continue
+
+            latencia = time.monotonic() - inicio
+            espera_erro = 0.0
+            metricas.observar("likert_sheets_append_segundos", latencia)
+            metricas.observar("likert_sheets_append_celulas", sum(len(linha) for linha in linhas), limites=metricas.BUCKETS_TAMANHO)
+            with self._lock:
+                self._conn.executemany("DELETE FROM envios WHERE id = ?", [(i,) for i in ids])
+                self._envios_concluidos += len(ids)
+                self._linhas_enviadas += len(linhas)
+                self._lotes_enviados += 1
+                self._ultima_latencia = latencia
+                self._soma_latencias += latencia
+                self._ultimo_atraso = time.time() - criados[0]
+                self._ultimo_erro = None
+
+    def _recusado(self, ids, erro):
+        """A API recusou o conteúdo: divide o lote ou, se for um envio só, o move para os rejeitados."""
+        with self._lock:
+            self._falhas += 1
+            self._ultimo_erro = f"{type(erro).__name__}: {erro}"
+            if len(ids) > 1:
+                self._isolar_ate = ids[-1]
+                self._max_envios = len(ids) // 2
+                return
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO envios_rejeitados (id, criado_em, num_linhas, linhas, rejeitado_em, erro, aba) "
+                    "SELECT id, criado_em, num_linhas, linhas, ?, ?, aba FROM envios WHERE id = ?",
+                    (time.time(), str(erro), ids[0]),
+                )
+                self._conn.execute("DELETE FROM envios WHERE id = ?", (ids[0],))
+        metricas.incrementar("likert_fila_envios_rejeitados_total")
+        metricas.registrar_evento("envio_rejeitado", erro=str(erro), envio=ids[0])
+
+    def _aguardar(self, segundos):
+        """Dorme sem impedir o encerramento. Retorna True se foi pedido para parar."""
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._parar, timeout=segundos)
+            return self._parar
+
+
+def main():
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Lista os envios recusados pela planilha e, se pedido, os devolve à fila.")
+    parser.add_argument("--spool", default="spool_envios.sqlite3", help="Arquivo do spool (um por aba no app)")
+    parser.add_argument("--aba", help="Só os envios desta aba (padrão: todos do spool)")
+    parser.add_argument("--reenviar", action="store_true", help="Devolve os envios listados à fila")
+    args = parser.parse_args()
+
+    # Sem planilha e sem thread: só o spool é lido e alterado
+    fila = FilaEnvio(None, caminho_spool=args.spool, iniciar=False, aba=args.aba)
+    rejeitados = fila.rejeitados()
+    for id_envio, aba, num_linhas, rejeitado_em, erro in rejeitados:
+        quando = datetime.fromtimestamp(rejeitado_em).isoformat(timespec="seconds")
+        print(f"{id_envio}\t{aba or '-'}\t{num_linhas} linhas\t{quando}\t{erro}")
+    print(f"{len(rejeitados)} envios rejeitados.")
+    if args.reenviar and rejeitados:
+        print(f"{fila.reenviar_rejeitados()} envios devolvidos à fila.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# formato.py
+"""Layouts de gravação das respostas na planilha.
+
+- Formato "longo" (padrão histórico): uma linha por item respondido, 9 colunas.
+- Formato "largo": uma linha por envio, uma coluna por ID de item (IF01…PT12)
+  mais a versão do questionário. Reduz ~430 células por respondente para ~54.
+
+`larga_para_longa` converte linhas largas de volta ao layout longo, para que
+quem consome a aba "Likert" continue funcionando.
+
+O motor de pontuação (NumPy) só é importado quando uma linha é pontuada, para
+não pesar no carregamento do app.
+"""
+
+CABECALHO_LONGO = [
+    "Timestamp", "ID_Organizacao", "Respondente", "Data", "Organizacao",
+    "Bloco", "Item", "Resposta", "Pontuacao",
+]
+
+# Colunas fixas do formato largo, antes das colunas de itens
+COLUNAS_META_LARGO = ["Timestamp", "ID_Organizacao", "Respondente", "Data", "Organizacao", "Versao"]
+
+FORMATOS = ("longo", "largo")
+
+
+def cabecalho_largo(itens):
+    """Cabeçalho do formato largo para uma lista de itens (Bloco, ID, Item, Reverso)."""
+    return COLUNAS_META_LARGO + [item_id for _, item_id, _, _ in itens]
+
+
+def linhas_longas(meta, itens, respostas):
+    """Linhas do formato longo para um envio.
+
+    `meta` é a sequência (timestamp, id_organizacao, respondente, data, organizacao)
+    e `respostas` é o dicionário ID → resposta da sessão.
+    """
+    from pontuacao import esquema_de, pontuacao_para_planilha, pontuar
+
+    pontuacoes = pontuar(respostas, esquema_de(itens)).pontuacoes[0]
+    linhas = []
+    for (bloco, item_id, texto, _), pontuacao in zip(itens, pontuacoes):
+        resposta = respostas.get(item_id)
+        if resposta is None:
+            resposta = "N/A"
+        linhas.append(list(meta) + [bloco, texto, resposta, pontuacao_para_planilha(pontuacao)])
+    return linhas
+
+
+def linha_larga(meta, itens, respostas, versao):
+    """Linha única do formato largo: metadados, versão e a resposta bruta de cada item."""
+    valores = []
+    for _, item_id, _, _ in itens:
+        resposta = respostas.get(item_id)
+        valores.append("N/A" if resposta is None else resposta)
+    return list(meta) + [versao] + valores
+
+
+def larga_para_longa(linhas, itens_por_versao, cabecalho=None, ignoradas=None):
+    """Converte linhas do formato largo para o layout longo de 9 colunas.
+
+    `itens_por_versao` mapeia a versão do questionário para a lista de itens
+    usada naquela versão (o texto do item e o sinal de reverso vêm dela).
+    Se `cabecalho` for informado, as colunas de itens são localizadas pelo ID,
+    o que tolera reordenação de colunas na planilha.
+
+    Linhas que não podem ser convertidas (versão desconhecida, ou item da versão
+    ausente do cabeçalho) são puladas em vez de interromper o lote; se
+    `ignoradas` for uma lista, recebe (linha, motivo) de cada uma.
+    """
+    from pontuacao import esquema_de, pontuacao_para_planilha, pontuar_matriz
+
+    n_meta = len(COLUNAS_META_LARGO)
+    posicoes = None
+    if cabecalho is not None:
+        posicoes = {nome: i for i, nome in enumerate(cabecalho)}
+
+    # Agrupa as linhas por versão para pontuar cada grupo em uma única passada
+    por_versao = {}
+    for linha in linhas:
+        if linha:
+            por_versao.setdefault(linha[n_meta - 1], []).append(linha)
+
+    convertidas = {}
+    for versao, grupo in por_versao.items():
+        itens = itens_por_versao.get(versao)
+        if itens is None:
+            motivo = f"versão de questionário desconhecida: {versao!r}"
+        elif posicoes is not None and any(item_id not in posicoes for _, item_id, _, _ in itens):
+            motivo = f"cabeçalho sem todos os itens da versão {versao!r}"
+        else:
+            motivo = None
+        if motivo is not None:
+            if ignoradas is not None:
+                ignoradas.extend((linha, motivo) for linha in grupo)
+            continue
+        indices = [posicoes[item_id] if posicoes is not None else n_meta + i
+                   for i, (_, item_id, _, _) in enumerate(itens)]
+        respostas = [
+            [linha[j] if j < len(linha) and linha[j] != "" else "N/A" for j in indices]
+            for linha in grupo
+        ]
+        pontuacoes = pontuar_matriz(respostas, esquema_de(itens)).pontuacoes
+        for linha, resp_linha, pont_linha in zip(grupo, respostas, pontuacoes):
+            meta = list(linha[:n_meta - 1])
+            convertidas[id(linha)] = [
+                meta + [bloco, texto, resposta, pontuacao_para_planilha(pontuacao)]
+                for (bloco, _, texto, _), resposta, pontuacao in zip(itens, resp_linha, pont_linha)
+            ]
+
+    # Mantém a ordem original das linhas
+    saida = []
+    for linha in linhas:
+        if linha:
+            saida.extend(convertidas.get(id(linha), ()))
+    return saida
+
+
+def letra_coluna(numero):
+    """Letra da coluna na notação A1: 1 → "A", 9 → "I", 27 → "AA"."""
+    letras = ""
+    while numero:
+        numero, resto = divmod(numero - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return letras
+
+
+def garantir_cabecalho(planilha, cabecalho):
+    """Grava o cabeçalho na primeira linha se a aba ainda estiver vazia."""
+    if not planilha.row_values(1):
+        planilha.append_rows([cabecalho], value_input_option="RAW")
@@ -0,0 +1,140 @@
+# itens.py
+"""Banco de itens: instrumentos carregados de arquivos de definição versionados.
+
+Cada instrumento fica em `instrumentos/<nome>.json`, com "nome", "versao",
+"titulo" e a lista de "itens" (bloco, id, item, reverso). A "versao" é gravada
+junto com cada envio no formato largo e deve ser incrementada sempre que um item
+for incluído, removido ou reescrito; versões antigas podem continuar na pasta
+com outro nome de arquivo, para que `itens_por_versao()` ainda as reconheça.
+
+Cada arquivo é compilado uma única vez por processo em um `Instrumento`
+imutável, compartilhado por todas as sessões. A cada consulta só o `stat` do
+arquivo é verificado: se mtime/tamanho mudarem e o conteúdo (hash) também,
+o instrumento é recompilado.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+PASTA_INSTRUMENTOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instrumentos")
+INSTRUMENTO_PADRAO = "infraestrutura"
+
+_NOME_VALIDO = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+@dataclass(frozen=True)
+class Instrumento:
+    nome: str
+    versao: str
+    titulo: str
+    itens: tuple  # ((Bloco, ID, Item, Reverso), ...)
+    por_id: MappingProxyType  # ID → (Bloco, ID, Item, Reverso)
+    posicao: MappingProxyType  # ID → posição em `itens` (índice no vetor de respostas)
+    blocos: tuple  # Índice por bloco, ver `indexar_por_bloco`
+    reverso: tuple  # Máscara de itens reversos, na ordem de `itens`
+    hash: str  # SHA-256 do arquivo de definição
+
+
+def indexar_por_bloco(itens):
+    """Agrupa os itens por bloco, na ordem original, já com os rótulos prontos para exibição.
+
+    Retorna uma tupla imutável de (bloco, prefixo, ((ID, rótulo), ...)), montada
+    uma única vez, para que o formulário não precise filtrar tabelas a cada execução.
+    """
+    blocos = {}
+    for bloco, item_id, texto, reverso in itens:
+        rotulo = f'({item_id}) {texto}' + (' (R)' if reverso == 'SIM' else '')
+        blocos.setdefault(bloco, []).append((item_id, rotulo))
+    return tuple(
+        (bloco, itens_bloco[0][0][:2], tuple(itens_bloco))
+        for bloco, itens_bloco in blocos.items()
+    )
+
+
+def compilar_instrumento(conteudo, hash_arquivo=""):
+    """Valida uma definição (dicionário lido do JSON) e monta o `Instrumento` imutável."""
+    itens = tuple(
+        (item["bloco"], item["id"], item["item"], item.get("reverso", "NÃO"))
+        for item in conteudo["itens"]
+    )
+    por_id = {}
+    for item in itens:
+        if item[1] in por_id:
+            raise ValueError(f"ID de item duplicado no instrumento {conteudo['nome']!r}: {item[1]}")
+        if item[3] not in ("SIM", "NÃO"):
+            raise ValueError(f"Valor de 'reverso' inválido no item {item[1]}: {item[3]!r}")
+        por_id[item[1]] = item
+    return Instrumento(
+        nome=conteudo["nome"],
+        versao=conteudo["versao"],
+        titulo=conteudo.get("titulo", conteudo["nome"]),
+        itens=itens,
+        por_id=MappingProxyType(por_id),
+        posicao=MappingProxyType({item[1]: i for i, item in enumerate(itens)}),
+        blocos=indexar_por_bloco(itens),
+        reverso=tuple(item[3] == "SIM" for item in itens),
+        hash=hash_arquivo,
+    )
+
+
+# --- CACHE POR PROCESSO ---
+# caminho → (mtime_ns, tamanho, Instrumento)
+_cache = {}
+_lock = threading.Lock()
+
+
+def caminho_instrumento(nome):
+    if not _NOME_VALIDO.match(nome or ""):
+        raise ValueError(f"Nome de instrumento inválido: {nome!r}")
+    return os.path.join(PASTA_INSTRUMENTOS, f"{nome}.json")
+
+
+def carregar_instrumento(nome=INSTRUMENTO_PADRAO):
+    """Instrumento compilado, do cache do processo ou (re)lido do arquivo se ele mudou.
+
+    Levanta FileNotFoundError se o instrumento não existir.
+    """
+    caminho = caminho_instrumento(nome)
+    estado = os.stat(caminho)
+    chave = (estado.st_mtime_ns, estado.st_size)
+
+    em_cache = _cache.get(caminho)
+    if em_cache is not None and em_cache[:2] == chave:
+        return em_cache[2]
+
+    with _lock:
+        em_cache = _cache.get(caminho)
+        if em_cache is not None and em_cache[:2] == chave:
+            return em_cache[2]
+        with open(caminho, "rb") as f:
+            bruto = f.read()
+        hash_arquivo = hashlib.sha256(bruto).hexdigest()
+        if em_cache is not None and em_cache[2].hash == hash_arquivo:
+            instrumento = em_cache[2]  # Só o mtime mudou: reaproveita
+        else:
+            instrumento = compilar_instrumento(json.loads(bruto.decode("utf-8")), hash_arquivo)
+        _cache[caminho] = (chave[0], chave[1], instrumento)
+        return instrumento
+
+
+def listar_instrumentos():
+    """Nomes de todos os arquivos de instrumento disponíveis."""
+    return sorted(
+        arquivo[:-5] for arquivo in os.listdir(PASTA_INSTRUMENTOS)
+        if arquivo.endswith(".json") and _NOME_VALIDO.match(arquivo[:-5])
+    )
+
+
+def itens_por_versao():
+    """Mapeia cada versão de questionário conhecida para seus itens (usado ao ler o formato largo)."""
+    return {inst.versao: inst.itens for inst in map(carregar_instrumento, listar_instrumentos())}
+
+
+# Atalhos para o instrumento padrão (scripts offline e benchmarks)
+_padrao = carregar_instrumento()
+ITENS = _padrao.itens
+VERSAO_QUESTIONARIO = _padrao.versao
@@ -0,0 +1,159 @@
+# links.py
+"""Links assinados por organização: geração e verificação.
+
+Um link válido leva `org`, `exp` (timestamp Unix de validade) e `sig`, o
+HMAC-SHA256 de "org|exp" com a chave LINK_SECRET_KEY. O app usa `verificar`
+(uma vez por sessão e conjunto de parâmetros); a geração em lote fica na
+linha de comando:
+
+    python links.py organizacoes.csv --url https://wedja-likert.streamlit.app/ --saida links.csv
+
+O CSV de entrada tem a coluna "organizacao" e, opcionalmente, "validade"
+(data AAAA-MM-DD, válida até o fim do dia; data e hora ISO; ou timestamp Unix).
+Sem validade, vale `--dias` a partir de agora. A chave vem de `--chave`, da
+variável de ambiente LINK_SECRET_KEY ou de .streamlit/secrets.toml.
+"""
+import hashlib
+import hmac
+import os
+import time
+import urllib.parse
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time as hora
+
+
+@dataclass(frozen=True)
+class ResultadoLink:
+    """Resultado da verificação. `motivo` também é o rótulo da métrica de verificação."""
+
+    motivo: str  # valido, acesso_direto, expirado, assinatura_invalida, parametros_faltando, erro_configuracao, erro
+    organizacao: str = None
+    expira_em: int = None
+    detalhe: str = ""
+
+    @property
+    def valido(self):
+        return self.motivo in ("valido", "acesso_direto")
+
+    def na_data(self, agora=None):
+        """O mesmo resultado, mas "expirado" se a validade já passou (sem recalcular o HMAC)."""
+        agora = int(time.time()) if agora is None else agora
+        if self.motivo == "valido" and agora > self.expira_em:
+            return replace(self, motivo="expirado")
+        return self
+
+
+def assinar(organizacao, expira_em, chave):
+    """Assinatura hexadecimal de "organizacao|expira_em"."""
+    mensagem = f"{organizacao}|{expira_em}".encode("utf-8")
+    return hmac.new(chave.encode("utf-8"), mensagem, hashlib.sha256).hexdigest()
+
+
+def gerar_link(url_base, organizacao, expira_em, chave, **extras):
+    """URL do app com org, exp e sig (e parâmetros extras, ex.: inst="outro")."""
+    expira_em = int(expira_em)
+    parametros = {"org": organizacao, "exp": expira_em, "sig": assinar(organizacao, expira_em, chave), **extras}
+    return f"{url_base.rstrip('?')}?{urllib.parse.urlencode(parametros)}"
+
+
+def verificar(org, exp, sig, chave, agora=None):
+    """Verifica os parâmetros do link (como chegam em st.query_params).
+
+    Sem nenhum parâmetro é um acesso direto, permitido. `chave` None com
+    parâmetros presentes é erro de configuração.
+    """
+    if not (org and exp and sig):
+        return ResultadoLink("parametros_faltando" if (org or exp or sig) else "acesso_direto")
+    if not chave:
+        return ResultadoLink("erro_configuracao")
+
+    organizacao = urllib.parse.unquote(org)
+    esperada = assinar(organizacao, exp, chave)
+    if not hmac.compare_digest(esperada.encode("utf-8"), sig.encode("utf-8")):
+        return ResultadoLink("assinatura_invalida")
+    try:
+        expira_em = int(exp)
+    except ValueError as e:
+        return ResultadoLink("erro", detalhe=str(e))
+    return ResultadoLink("valido", organizacao=organizacao, expira_em=expira_em).na_data(agora)
+
+
+def interpretar_validade(texto, fim_do_dia=True):
+    """Timestamp Unix a partir de "AAAA-MM-DD", de data e hora ISO ou de um timestamp."""
+    texto = texto.strip()
+    if texto.isdigit():
+        return int(texto)
+    try:
+        dia = date.fromisoformat(texto)
+    except ValueError:
+        return int(datetime.fromisoformat(texto).timestamp())
+    return int(datetime.combine(dia, hora.max if fim_do_dia else hora.min).timestamp())
+
+
+def _chave_configurada():
+    chave = os.environ.get("LINK_SECRET_KEY")
+    if chave:
+        return chave
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+    if os.path.exists(caminho):
+        import tomllib
+
+        with open(caminho, "rb") as f:
+            return tomllib.load(f).get("LINK_SECRET_KEY")
+    return None
+
+
+def main():
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Gera links assinados do questionário para um CSV de organizações.")
+    parser.add_argument("entrada", help='CSV com a coluna "organizacao" e, opcionalmente, "validade"')
+    parser.add_argument("--url", required=True, help="URL base do app")
+    parser.add_argument("--saida", help="CSV de saída (padrão: saída padrão)")
+    parser.add_argument("--chave", help="LINK_SECRET_KEY (padrão: variável de ambiente ou .streamlit/secrets.toml)")
+    parser.add_argument("--dias", type=int, default=30, help="Validade, em dias, das linhas sem a coluna validade")
+    parser.add_argument("--inst", help="Instrumento (parâmetro inst) a incluir nos links")
+    parser.add_argument("--coluna-org", default="organizacao")
+    parser.add_argument("--coluna-validade", default="validade")
+    args = parser.parse_args()
+
+    chave = args.chave or _chave_configurada()
+    if not chave:
+        parser.error("LINK_SECRET_KEY não encontrada: use --chave, a variável de ambiente ou .streamlit/secrets.toml")
+    extras = {"inst": args.inst} if args.inst else {}
+    validade_padrao = int(time.time()) + args.dias * 86400
+
+    saida = open(args.saida, "w", newline="", encoding="utf-8") if args.saida else sys.stdout
+    gerados = 0
+    try:
+        with open(args.entrada, newline="", encoding="utf-8-sig") as f:
+            escritor = csv.writer(saida)
+            escritor.writerow(["organizacao", "validade", "exp", "url"])
+            for numero, linha in enumerate(csv.DictReader(f), start=2):
+                organizacao = (linha.get(args.coluna_org) or "").strip()
+                if not organizacao:
+                    print(f"Linha {numero}: sem organização, ignorada.", file=sys.stderr)
+                    continue
+                texto_validade = (linha.get(args.coluna_validade) or "").strip()
+                try:
+                    expira_em = interpretar_validade(texto_validade) if texto_validade else validade_padrao
+                except ValueError:
+                    print(f"Linha {numero}: validade inválida ({texto_validade!r}), ignorada.", file=sys.stderr)
+                    continue
+                escritor.writerow([
+                    organizacao,
+                    datetime.fromtimestamp(expira_em).isoformat(timespec="seconds"),
+                    expira_em,
+                    gerar_link(args.url, organizacao, expira_em, chave, **extras),
+                ])
+                gerados += 1
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{gerados} links gerados.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
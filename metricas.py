@@ -0,0 +1,272 @@
+# metricas.py
+"""Instrumentação leve dos caminhos críticos do app.
+
+Contadores, medidores (gauges) e histogramas em memória, compartilhados pelo
+processo inteiro. Cada observação custa uma busca em dicionário e um lock, o que
+permite deixar a instrumentação ligada em produção.
+
+Exportação:
+- `texto_prometheus()`: formato de exposição de texto do Prometheus;
+- `gravar_arquivo(caminho)`: o mesmo texto em arquivo (textfile collector);
+- `iniciar_servidor_http(porta)`: endpoint `/metrics` numa thread à parte;
+- `iniciar_exportacao(...)`: thread que periodicamente grava o arquivo e
+  registra um resumo em JSON no logger "likert.metricas".
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos histogramas de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Limites dos histogramas de tamanho (células, linhas, reexecuções)
+BUCKETS_TAMANHO = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+logger = logging.getLogger("likert.metricas")
+
+
+def _escapar(valor):
+    """Escapa o valor de um rótulo no formato de texto do Prometheus."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Histograma:
+    __slots__ = ("limites", "contagens", "soma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # Último: +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Registro:
+    """Conjunto de métricas do processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._medidores = {}
+        self._histogramas = {}
+        self._ajuda = {}
+        self._coletores = []
+
+    @staticmethod
+    def _chave(nome, rotulos):
+        # Valores como texto: rótulos int e str misturados quebrariam a ordenação na exportação
+        return (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+
+    def descrever(self, nome, ajuda):
+        self._ajuda[nome] = ajuda
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        with self._lock:
+            self._medidores[self._chave(nome, rotulos)] = valor
+
+    def observar(self, nome, valor, limites=BUCKETS_LATENCIA, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = _Histograma(limites)
+            histograma.observar(valor)
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        """Mede a duração do bloco e a registra no histograma `nome` (em segundos)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def registrar_coletor(self, coletor):
+        """Função chamada antes de cada exportação, para atualizar medidores (ex.: tamanho da fila)."""
+        with self._lock:
+            self._coletores.append(coletor)
+
+    def _coletar(self):
+        with self._lock:
+            coletores = list(self._coletores)
+        for coletor in coletores:
+            try:
+                coletor(self)
+            except Exception as e:
+                logger.warning("Coletor de métricas falhou: %s", e)
+
+    # --- EXPORTAÇÃO ---
+    def instantaneo(self):
+        """Cópia dos valores atuais: {"contadores", "medidores", "histogramas"}."""
+        self._coletar()
+
+        def nome_serie(chave):
+            nome, rotulos = chave
+            return nome + ("{" + ",".join(f"{k}={v}" for k, v in rotulos) + "}" if rotulos else "")
+
+        with self._lock:
+            return {
+                "contadores": {nome_serie(k): v for k, v in self._contadores.items()},
+                "medidores": {nome_serie(k): v for k, v in self._medidores.items()},
+                "histogramas": {
+                    nome_serie(k): {"total": h.total, "soma": h.soma, "media": h.soma / h.total if h.total else None}
+                    for k, h in self._histogramas.items()
+                },
+            }
+
+    def texto_prometheus(self):
+        self._coletar()
+
+        def rotulos_texto(rotulos, extra=()):
+            pares = list(rotulos) + list(extra)
+            if not pares:
+                return ""
+            return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+        linhas = []
+        tipos_vistos = set()
+
+        def cabecalho(nome, tipo):
+            if nome in tipos_vistos:
+                return
+            tipos_vistos.add(nome)
+            if nome in self._ajuda:
+                linhas.append(f"# HELP {nome} {self._ajuda[nome]}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+        with self._lock:
+            for (nome, rotulos), valor in sorted(self._contadores.items()):
+                cabecalho(nome, "counter")
+                linhas.append(f"{nome}{rotulos_texto(rotulos)} {valor}")
+            for (nome, rotulos), valor in sorted(self._medidores.items()):
+                cabecalho(nome, "gauge")
+                linhas.append(f"{nome}{rotulos_texto(rotulos)} {valor}")
+            for (nome, rotulos), h in sorted(self._histogramas.items(), key=lambda x: x[0]):
+                cabecalho(nome, "histogram")
+                acumulado = 0
+                for limite, contagem in zip(list(h.limites) + ["+Inf"], h.contagens):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{rotulos_texto(rotulos, [('le', limite)])} {acumulado}")
+                linhas.append(f"{nome}_sum{rotulos_texto(rotulos)} {h.soma}")
+                linhas.append(f"{nome}_count{rotulos_texto(rotulos)} {h.total}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar_arquivo(self, caminho):
+        """Grava o texto Prometheus de forma atômica (para o textfile collector)."""
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(self.texto_prometheus())
+        os.replace(temporario, caminho)
+
+    def registrar_log(self):
+        """Registra um resumo estruturado (uma linha JSON) no logger "likert.metricas"."""
+        logger.info(json.dumps({"evento": "metricas", "ts": time.time(), **self.instantaneo()}, ensure_ascii=False, default=str))
+
+
+# Texto do "# HELP" de cada métrica emitida pelo app, pela fila e pelos módulos auxiliares
+DESCRICOES = {
+    "likert_reruns_total": "Execuções do script do app.",
+    "likert_rerun_segundos": "Duração de cada execução do script, por resultado.",
+    "likert_reruns_por_envio": "Execuções do script na sessão até o envio.",
+    "likert_bloco_segundos": "Tempo para desenhar cada bloco do formulário.",
+    "likert_envios_total": "Envios registrados, por formato e armazenamento.",
+    "likert_erros_total": "Erros mostrados ao respondente, por local.",
+    "likert_link_verificacao_total": "Verificações de link assinado, por resultado.",
+    "likert_rascunhos_restaurados_total": "Rascunhos retomados pelo link de retomada.",
+    "likert_relatorio_cache_total": "Pedidos de relatório, por resultado no cache.",
+    "likert_relatorio_segundos": "Tempo para gerar um relatório, por formato.",
+    "likert_sheets_append_segundos": "Latência de cada append_rows na planilha.",
+    "likert_sheets_append_celulas": "Células enviadas em cada append_rows.",
+    "likert_sheets_append_erros_total": "Falhas de append_rows, por status HTTP ou tipo de erro.",
+    "likert_sheets_conexao_segundos": "Tempo para abrir o cliente do Google Sheets.",
+    "likert_sheets_reconexoes_total": "Reconexões ao Google Sheets, por motivo.",
+    "likert_sheets_circuito_aberturas_total": "Aberturas do disjuntor da conexão com a planilha.",
+    "likert_sheets_circuito_estado": "Estado do disjuntor (0 fechado, 1 meio aberto, 2 aberto).",
+    "likert_fila_envios_pendentes": "Envios no spool aguardando gravação, por aba.",
+    "likert_fila_idade_mais_antigo_segundos": "Idade do envio pendente mais antigo, por aba.",
+    "likert_fila_envios_rejeitados_total": "Envios recusados pela planilha e movidos para envios_rejeitados.",
+    "likert_sqlite_gravacao_segundos": "Tempo da transação de um envio no SQLite.",
+    "likert_espelho_envios_total": "Envios copiados do SQLite para a planilha, por aba.",
+}
+
+REGISTRO = Registro()
+for _nome, _ajuda in DESCRICOES.items():
+    REGISTRO.descrever(_nome, _ajuda)
+
+# Atalhos no nível do módulo, usados pelo app e pela fila de envio
+incrementar = REGISTRO.incrementar
+definir = REGISTRO.definir
+observar = REGISTRO.observar
+cronometrar = REGISTRO.cronometrar
+registrar_coletor = REGISTRO.registrar_coletor
+texto_prometheus = REGISTRO.texto_prometheus
+
+
+def registrar_evento(evento, **campos):
+    """Evento pontual (ex.: falha de envio) como uma linha JSON no log."""
+    logger.info(json.dumps({"evento": evento, "ts": time.time(), **campos}, ensure_ascii=False, default=str))
+
+
+def configurar_log(nivel=logging.INFO):
+    """Envia o logger "likert.metricas" para a saída padrão, se ninguém o configurou ainda."""
+    if not logger.handlers:
+        manipulador = logging.StreamHandler()
+        manipulador.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(manipulador)
+        logger.propagate = False
+    logger.setLevel(nivel)
+
+
+def iniciar_exportacao(intervalo=60.0, arquivo=None, registro=REGISTRO):
+    """Thread daemon que, a cada `intervalo` segundos, grava `arquivo` (se houver) e registra o resumo no log."""
+    configurar_log()
+
+    def executar():
+        while True:
+            time.sleep(intervalo)
+            try:
+                if arquivo:
+                    registro.gravar_arquivo(arquivo)
+                registro.registrar_log()
+            except Exception as e:
+                logger.warning("Falha ao exportar métricas: %s", e)
+
+    thread = threading.Thread(target=executar, name="exportacao-metricas", daemon=True)
+    thread.start()
+    return thread
+
+
+def iniciar_servidor_http(porta, endereco="0.0.0.0", registro=REGISTRO):
+    """Serve `/metrics` no formato Prometheus numa thread daemon. Retorna o servidor."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = registro.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass  # Sem log por requisição
+
+    servidor = ThreadingHTTPServer((endereco, porta), _Manipulador)
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return servidor
@@ -1,41 +1,148 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
 import time
-from playwright.sync_api import sync_playwright
+import urllib.parse
+import urllib.request
 
 # --- CONFIGURAÇÕES ---
 # Coloque a URL completa do seu aplicativo Streamlit aqui
-URL_DO_APP = "https://wedja-likert.streamlit.app/" 
-# Coloque o texto exato do botão que você quer clicar
-TEXTO_DO_BOTAO = "Finalizar e Gerar Relatório"
+URL_DO_APP = "https://wedja-likert.streamlit.app/"
+# Parâmetro que faz o app só aquecer os caches (ver "AQUECIMENTO" em app_likert.py)
+QUERY_AQUECIMENTO = "aquecer=1"
 
-def ping_e_clica():
-    print(f"Iniciando o ping para: {URL_DO_APP}")
-    with sync_playwright() as p:
+
+def ping_http(url_base, timeout=120):
+    """Requisição HTTP simples ao health check do Streamlit. Mantém o servidor acordado."""
+    url = urllib.parse.urljoin(url_base.rstrip("/") + "/", "_stcore/health")
+    inicio = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as resposta:
+        corpo = resposta.read().decode("utf-8", "replace").strip()
+    return time.perf_counter() - inicio, corpo
+
+
+def url_websocket(url_base):
+    """Endereço do websocket de sessões do Streamlit (`/_stcore/stream`) a partir da URL do app."""
+    partes = urllib.parse.urlsplit(url_base)
+    esquema = "wss" if partes.scheme == "https" else "ws"
+    caminho = partes.path.rstrip("/") + "/_stcore/stream"
+    return urllib.parse.urlunsplit((esquema, partes.netloc, caminho, "", ""))
+
+
+class FalhaAquecimento(RuntimeError):
+    """A execução de aquecimento terminou sem confirmar "aquecido: ok"."""
+
+
+def aquecer_via_websocket(url_base, timeout=120):
+    """Abre uma sessão pelo websocket do Streamlit e executa o script com ?aquecer=1.
+
+    Isso abre a conexão gerenciada com a planilha e popula `carregar_itens` no
+    processo do servidor, sem navegador. Retorna a latência até o fim do script;
+    levanta FalhaAquecimento se o script não confirmar "aquecido: ok" (exceção
+    no app ou planilha inacessível).
+    """
+    from websockets.sync.client import connect
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    msg = BackMsg()
+    msg.rerun_script.query_string = QUERY_AQUECIMENTO
+    msg.rerun_script.page_script_hash = ""
+
+    textos, excecoes = [], []
+    inicio = time.perf_counter()
+    with connect(url_websocket(url_base), subprotocols=["streamlit"], open_timeout=timeout, max_size=None) as ws:
+        ws.send(msg.SerializeToString())
+        while True:
+            resposta = ForwardMsg()
+            resposta.ParseFromString(ws.recv(timeout=timeout))
+            tipo = resposta.WhichOneof("type")
+            if tipo == "delta" and resposta.delta.WhichOneof("type") == "new_element":
+                elemento = resposta.delta.new_element
+                if elemento.WhichOneof("type") == "text":
+                    textos.append(elemento.text.body)
+                elif elemento.WhichOneof("type") == "exception":
+                    excecoes.append(f"{elemento.exception.type}: {elemento.exception.message}")
+            elif tipo == "script_finished":
+                latencia = time.perf_counter() - inicio
+                break
+
+    if excecoes:
+        raise FalhaAquecimento(f"Exceção no app durante o aquecimento: {'; '.join(excecoes)}")
+    if "aquecido: ok" not in textos:
+        raise FalhaAquecimento(f"Aquecimento sem confirmação: {' / '.join(textos) or 'nenhuma resposta do app'}")
+    return latencia
+
+
+def iniciar_app_local(porta, ambiente=None, saida=subprocess.DEVNULL):
+    """Sobe o app_likert.py localmente e espera o health check responder.
+
+    `ambiente` substitui as variáveis de ambiente do servidor (ex.: aba fake do
+    teste de carga); `saida` recebe o stdout/stderr dele.
+    """
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app_likert.py",
+         "--server.headless=true", f"--server.port={porta}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=ambiente,
+        stdout=saida, stderr=saida,
+    )
+    url = f"http://localhost:{porta}/"
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
         try:
-            # Inicia o navegador (headless=True roda em segundo plano, sem abrir janela)
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Navega até a URL do seu app
-            print("Acessando a página...")
-            page.goto(URL_DO_APP, timeout=120000) # Timeout de 2 minutos para carregar
-            
-            # Espera um tempo extra para o Streamlit renderizar tudo
-            print("Página carregada. Aguardando 10 segundos para renderização completa...")
-            time.sleep(10)
-            
-            # Clica no botão
-            print(f"Procurando e clicando no botão com o texto: '{TEXTO_DO_BOTAO}'")
-            page.locator("#autoclick-div button").click()
-            
-            # Espera mais um pouco para a ação do clique ser processada
-            print("Botão clicado. Aguardando 5 segundos...")
-            time.sleep(5)
-            
-            browser.close()
-            print("Ping com clique concluído com sucesso!")
-
-        except Exception as e:
-            print(f"Ocorreu um erro: {e}")
+            ping_http(url, timeout=2)
+            return processo, url
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("O app local não respondeu ao health check em 60 s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantém o app acordado e aquece os caches do servidor.")
+    parser.add_argument("--url", default=URL_DO_APP, help="URL base do app")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Quantas vezes aquecer (para medir latência)")
+    parser.add_argument("--local", action="store_true", help="Sobe o app localmente e mede contra ele")
+    parser.add_argument("--porta", type=int, default=8599)
+    parser.add_argument("--so-http", action="store_true", help="Só faz o ping HTTP, sem sessão websocket")
+    parser.add_argument("--json", action="store_true", help="Imprime as latências em JSON")
+    args = parser.parse_args()
+
+    processo = None
+    url = args.url
+    if args.local:
+        processo, url = iniciar_app_local(args.porta)
+
+    latencias_http, latencias_ws = [], []
+    try:
+        print(f"Iniciando o aquecimento de: {url}")
+        for _ in range(args.repeticoes):
+            latencia, corpo = ping_http(url)
+            latencias_http.append(latencia)
+            print(f"Health check: {corpo!r} em {latencia * 1000:.1f} ms")
+            if not args.so_http:
+                latencia = aquecer_via_websocket(url)
+                latencias_ws.append(latencia)
+                print(f"Execução de aquecimento concluída em {latencia * 1000:.1f} ms")
+    except Exception as e:
+        print(f"Ocorreu um erro: {e}")
+        sys.exit(1)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    if args.json:
+        print(json.dumps({"http_s": latencias_http, "websocket_s": latencias_ws}))
+    elif args.repeticoes > 1:
+        for nome, valores in (("HTTP", latencias_http), ("websocket", latencias_ws)):
+            if valores:
+                print(f"{nome}: mediana={statistics.median(valores) * 1000:.1f} ms  "
+                      f"min={min(valores) * 1000:.1f} ms  max={max(valores) * 1000:.1f} ms")
+
 
 if __name__ == "__main__":
-    ping_e_clica()
\ No newline at end of file
+    main()
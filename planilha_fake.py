@@ -0,0 +1,219 @@
+# planilha_fake.py
+"""Aba de planilha em memória que imita a interface usada do gspread.Worksheet.
+
+Serve para exercitar a fila de envio e os demais componentes sem acesso
+ao Google Sheets. Permite simular latência e erros de cota (HTTP 429).
+`ClienteFake` imita o gspread.Client (open → worksheet) e simula queda de
+rede, erros 5xx e token expirado, para exercitar a conexao.ConexaoPlanilha.
+"""
+import os
+import random
+import re
+import threading
+import time
+
+LIMITE_CELULA = 50000  # Caracteres por célula aceitos pela API do Sheets
+_INTERVALO_A1 = re.compile(r"^([A-Z]+)(\d+)?(?::([A-Z]+)(\d+)?)?$")
+
+
+def _coluna_para_indice(letras):
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - ord("A") + 1)
+    return indice
+
+
+class _RespostaFake:
+    """Imita o objeto `requests.Response` que o gspread guarda em APIError."""
+
+    def __init__(self, status_code, mensagem):
+        self.status_code = status_code
+        self.text = mensagem
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text, "status": "FAKE"}}
+
+
+def erro_api(status_code=429, mensagem="Quota exceeded (fake)"):
+    """Cria o mesmo tipo de exceção que o gspread levanta em erros da API."""
+    try:
+        from gspread.exceptions import APIError
+    except ImportError:
+        erro = RuntimeError(f"APIError [{status_code}]: {mensagem}")
+        erro.response = _RespostaFake(status_code, mensagem)
+        return erro
+    return APIError(_RespostaFake(status_code, mensagem))
+
+
+class PlanilhaFake:
+    """Worksheet em memória, segura para uso a partir de várias threads."""
+
+    def __init__(self, titulo="Likert", latencia=0.0, erros_429=0, taxa_429=0.0):
+        self.title = titulo
+        self.latencia = latencia
+        self.erros_429 = erros_429  # Quantas chamadas seguintes devem falhar com 429
+        self.taxa_429 = taxa_429  # Probabilidade de qualquer chamada falhar com 429
+        self.total_429 = 0
+        self.linhas = []
+        self.chamadas_append = 0
+        self.chamadas_leitura = 0
+        self._lock = threading.Lock()
+
+    def injetar_429(self, quantidade):
+        """Faz as próximas `quantidade` chamadas falharem com erro de cota."""
+        with self._lock:
+            self.erros_429 = quantidade
+
+    def _simular_chamada(self):
+        """Levanta um erro 429 se ainda houver erros injetados. Chamar com o lock adquirido."""
+        if self.erros_429 > 0 or (self.taxa_429 and random.random() < self.taxa_429):
+            self.erros_429 = max(0, self.erros_429 - 1)
+            self.total_429 += 1
+            raise erro_api(429)
+
+    def append_rows(self, values, value_input_option=None, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.chamadas_append += 1
+            self._simular_chamada()
+            if any(len(str(v)) > LIMITE_CELULA for linha in values for v in linha):
+                raise erro_api(400, f"Your input contains more than the maximum of {LIMITE_CELULA} characters in a single cell.")
+            self.linhas.extend([list(linha) for linha in values])
+        return {"updates": {"updatedRows": len(values)}}
+
+    def row_values(self, row, **kwargs):
+        with self._lock:
+            return list(self.linhas[row - 1]) if 0 < row <= len(self.linhas) else []
+
+    @property
+    def row_count(self):
+        with self._lock:
+            return len(self.linhas)
+
+    def get_values(self, range_name=None, **kwargs):
+        """Leitura de um intervalo A1 (ex.: "A2:I500"), com valores como texto, igual à API."""
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.chamadas_leitura += 1
+            self._simular_chamada()
+            if range_name is None:
+                linha_ini, linha_fim, col_ini, col_fim = 1, len(self.linhas), 1, None
+            else:
+                m = _INTERVALO_A1.match(range_name.split("!")[-1])
+                if not m:
+                    raise ValueError(f"Intervalo não suportado pela planilha fake: {range_name!r}")
+                col_a, lin_a, col_b, lin_b = m.groups()
+                col_ini = _coluna_para_indice(col_a)
+                col_fim = _coluna_para_indice(col_b) if col_b else col_ini
+                linha_ini = int(lin_a) if lin_a else 1
+                linha_fim = int(lin_b) if lin_b else (linha_ini if col_b is None else len(self.linhas))
+            trecho = self.linhas[linha_ini - 1:linha_fim]
+            return [
+                ["" if v is None else str(v) for v in linha[col_ini - 1:col_fim]]
+                for linha in trecho
+            ]
+
+
+class ClienteFake:
+    """Cliente em memória com a interface usada do gspread.Client.
+
+    `abas` guarda as PlanilhaFake por título (criadas sob demanda, ou por
+    `fabrica_aba`). As falhas injetadas valem para qualquer chamada feita por
+    este cliente ou pelas abas abertas com ele.
+    """
+
+    def __init__(self, abas=None, fabrica_aba=None):
+        self.abas = abas if abas is not None else {}
+        self._fabrica_aba = fabrica_aba
+        self.token_valido = True
+        self.chamadas = 0
+        self._falhas = []
+        self._lock = threading.Lock()
+
+    def expirar_token(self):
+        """Toda chamada seguinte falha com 401, até um novo cliente ser criado."""
+        self.token_valido = False
+
+    def injetar_falhas(self, quantidade, tipo="rede"):
+        """Faz as próximas `quantidade` chamadas falharem: "rede" (ConnectionError) ou um status HTTP."""
+        with self._lock:
+            self._falhas.extend([tipo] * quantidade)
+
+    def _verificar(self):
+        with self._lock:
+            self.chamadas += 1
+            if not self.token_valido:
+                raise erro_api(401, "Request had invalid authentication credentials (fake)")
+            if self._falhas:
+                tipo = self._falhas.pop(0)
+                if tipo == "rede":
+                    raise ConnectionError("Connection reset by peer (fake)")
+                raise erro_api(tipo, f"Erro {tipo} (fake)")
+
+    def _aba(self, titulo):
+        with self._lock:
+            if titulo not in self.abas:
+                self.abas[titulo] = self._fabrica_aba(titulo) if self._fabrica_aba else PlanilhaFake(titulo)
+            return self.abas[titulo]
+
+    def open(self, titulo):
+        self._verificar()
+        return DocumentoFake(self, titulo)
+
+
+class DocumentoFake:
+    """Planilha (spreadsheet) aberta por um ClienteFake."""
+
+    def __init__(self, cliente, titulo):
+        self.cliente = cliente
+        self.title = titulo
+
+    def worksheet(self, titulo):
+        self.cliente._verificar()
+        return _AbaDoCliente(self.cliente, self.cliente._aba(titulo))
+
+    def fetch_sheet_metadata(self):
+        self.cliente._verificar()
+        return {"properties": {"title": self.title}, "sheets": [{"properties": {"title": t}} for t in self.cliente.abas]}
+
+
+class _AbaDoCliente:
+    """PlanilhaFake vista por um cliente: as chamadas passam pelas falhas injetadas nele."""
+
+    def __init__(self, cliente, aba):
+        self._cliente = cliente
+        self._aba = aba
+        self.title = aba.title
+
+    def append_rows(self, values, **kwargs):
+        self._cliente._verificar()
+        return self._aba.append_rows(values, **kwargs)
+
+    def get_values(self, range_name=None, **kwargs):
+        self._cliente._verificar()
+        return self._aba.get_values(range_name, **kwargs)
+
+    def row_values(self, row, **kwargs):
+        self._cliente._verificar()
+        return self._aba.row_values(row, **kwargs)
+
+
+# --- PLANILHAS COMPARTILHADAS NO PROCESSO (TESTES DE CARGA) ---
+# Com LIKERT_PLANILHA_FAKE=1 o app grava nestas abas em vez do Google Sheets.
+# LIKERT_FAKE_LATENCIA (segundos) e LIKERT_FAKE_TAXA_429 (0–1) configuram as abas criadas.
+_compartilhadas = {}
+_lock_compartilhadas = threading.Lock()
+
+
+def planilha_compartilhada(titulo="Likert"):
+    """Aba fake única por título, compartilhada por todas as sessões do processo."""
+    with _lock_compartilhadas:
+        if titulo not in _compartilhadas:
+            _compartilhadas[titulo] = PlanilhaFake(
+                titulo,
+                latencia=float(os.environ.get("LIKERT_FAKE_LATENCIA", 0)),
+                taxa_429=float(os.environ.get("LIKERT_FAKE_TAXA_429", 0)),
+            )
+        return _compartilhadas[titulo]
@@ -0,0 +1,127 @@
+# pontuacao.py
+"""Motor de pontuação vetorizado do questionário Likert.
+
+Pontua um envio ou uma matriz de envios (linhas = respondentes, colunas =
+itens na ordem do banco de itens) em uma única passada NumPy:
+- respostas fora de 1–5 (N/A, vazio, None) viram NaN e ficam fora das médias;
+- itens reversos recebem 6 − resposta;
+- para cada bloco são calculadas a média e a cobertura (fração de itens respondidos).
+
+O app (um envio por vez) e os processamentos offline (matrizes com milhares de
+envios) usam as mesmas funções.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+ESCALA_MIN, ESCALA_MAX = 1, 5
+
+
+@dataclass(frozen=True)
+class EsquemaPontuacao:
+    """Estrutura pré-calculada a partir do banco de itens."""
+
+    ids: tuple
+    blocos: tuple  # Nomes dos blocos, na ordem de aparição
+    reverso: np.ndarray  # (K,) bool
+    indicadora_blocos: np.ndarray  # (K, B) float: 1 se o item pertence ao bloco
+    itens_por_bloco: np.ndarray  # (B,) float
+
+
+@dataclass(frozen=True)
+class ResultadoPontuacao:
+    pontuacoes: np.ndarray  # (N, K) pontuação por item, NaN se não respondido
+    medias_bloco: np.ndarray  # (N, B) média por bloco, NaN se bloco sem respostas
+    cobertura_bloco: np.ndarray  # (N, B) fração de itens respondidos no bloco
+    media_geral: np.ndarray  # (N,)
+    cobertura_geral: np.ndarray  # (N,)
+    validas: np.ndarray  # (N,) número de respostas válidas
+
+
+def preparar_esquema(itens):
+    """Monta o esquema de pontuação a partir de uma lista (Bloco, ID, Item, Reverso)."""
+    ids = tuple(item_id for _, item_id, _, _ in itens)
+    blocos = tuple(dict.fromkeys(bloco for bloco, _, _, _ in itens))
+    posicao_bloco = {bloco: j for j, bloco in enumerate(blocos)}
+
+    reverso = np.array([rev == "SIM" for _, _, _, rev in itens], dtype=bool)
+    indicadora = np.zeros((len(ids), len(blocos)), dtype=np.float64)
+    for i, (bloco, _, _, _) in enumerate(itens):
+        indicadora[i, posicao_bloco[bloco]] = 1.0
+    reverso.setflags(write=False)
+    indicadora.setflags(write=False)
+    return EsquemaPontuacao(ids, blocos, reverso, indicadora, indicadora.sum(axis=0))
+
+
+@lru_cache(maxsize=16)
+def _esquema_em_cache(itens):
+    return preparar_esquema(itens)
+
+
+def esquema_de(itens):
+    """Esquema de pontuação reaproveitado entre chamadas com o mesmo banco de itens."""
+    return _esquema_em_cache(tuple(tuple(item) for item in itens))
+
+
+def _para_float(resposta):
+    try:
+        return float(resposta)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def matriz_respostas(valores):
+    """Converte uma matriz (N, K) de respostas brutas em float, com NaN para N/A.
+
+    Aceita números, textos como "3" (o que volta da planilha), "N/A", "" e None.
+    """
+    arr = np.asarray(valores)
+    if arr.dtype.kind in "biuf":
+        matriz = arr.astype(np.float64, copy=True)
+    else:
+        import pandas as pd  # Fatoração por hash: converte só os poucos valores distintos
+
+        codigos, distintos = pd.factorize(arr.ravel(), use_na_sentinel=True)
+        tabela = np.array([_para_float(v) for v in distintos] + [np.nan], dtype=np.float64)
+        matriz = tabela[codigos].reshape(arr.shape)  # Código -1 (None/NaN) cai no último NaN
+    matriz[(matriz < ESCALA_MIN) | (matriz > ESCALA_MAX)] = np.nan
+    return np.atleast_2d(matriz)
+
+
+def pontuar_matriz(matriz, esquema):
+    """Pontua N envios de uma vez. `matriz` é (N, K) na ordem de `esquema.ids`."""
+    respostas = matriz_respostas(matriz)
+    if respostas.shape[1] != len(esquema.ids):
+        raise ValueError(f"Esperadas {len(esquema.ids)} colunas de itens, recebidas {respostas.shape[1]}.")
+
+    pontuacoes = np.where(esquema.reverso, (ESCALA_MAX + ESCALA_MIN) - respostas, respostas)
+    respondido = ~np.isnan(pontuacoes)
+
+    somas = np.where(respondido, pontuacoes, 0.0) @ esquema.indicadora_blocos
+    contagens = respondido.astype(np.float64) @ esquema.indicadora_blocos
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias_bloco = somas / contagens
+        validas = contagens.sum(axis=1)
+        media_geral = somas.sum(axis=1) / validas
+
+    return ResultadoPontuacao(
+        pontuacoes=pontuacoes,
+        medias_bloco=medias_bloco,
+        cobertura_bloco=contagens / esquema.itens_por_bloco,
+        media_geral=media_geral,
+        cobertura_geral=validas / len(esquema.ids),
+        validas=validas.astype(np.int64),
+    )
+
+
+def pontuar(respostas, esquema):
+    """Pontua um único envio a partir do dicionário ID → resposta da sessão."""
+    # Conversão direta (48 valores): evita carregar o pandas no caminho do envio
+    linha = np.array([[_para_float(respostas.get(item_id)) for item_id in esquema.ids]])
+    return pontuar_matriz(linha, esquema)
+
+
+def pontuacao_para_planilha(valor):
+    """Formata uma pontuação para gravação: inteiro, ou "N/A" se não respondido."""
+    return "N/A" if np.isnan(valor) else int(valor)
@@ -0,0 +1,145 @@
+# rascunhos.py
+"""Respostas da sessão em formato compacto e rascunhos salvos automaticamente.
+
+`VetorRespostas` guarda uma resposta por posição de item em um `array('b')`
+(um byte por item) e mantém a contagem de respostas válidas a cada mudança,
+sem percorrer o vetor. Códigos: -1 = não respondido, 0 = N/A, 1–5 = escala.
+
+`ArmazemRascunhos` grava o vetor num SQLite local, indexado por um token
+aleatório. O app mostra ao respondente um link de retomada pessoal com o
+token (`?r=<token>`); se a conexão cair, ele reabre esse link e recebe as
+respostas de volta. O rascunho é descartado
+se a versão do instrumento mudou (as posições dos itens podem não bater mais).
+"""
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from array import array
+
+NAO_RESPONDIDO = -1
+CODIGO_NA = 0
+_TOKEN_VALIDO = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+class VetorRespostas:
+    """Respostas de uma sessão, por posição do item no instrumento."""
+
+    __slots__ = ("codigos", "validas")
+
+    def __init__(self, tamanho, codigos=None):
+        if codigos is None:
+            self.codigos = array("b", [NAO_RESPONDIDO]) * tamanho
+        else:
+            self.codigos = array("b", codigos)
+            if len(self.codigos) != tamanho:
+                raise ValueError(f"Esperadas {tamanho} respostas, recebidas {len(self.codigos)}.")
+        self.validas = sum(1 for c in self.codigos if c > CODIGO_NA)
+
+    @staticmethod
+    def codificar(resposta):
+        if resposta is None:
+            return NAO_RESPONDIDO
+        if resposta == "N/A":
+            return CODIGO_NA
+        return int(resposta)
+
+    def definir(self, posicao, resposta):
+        """Grava a resposta (1–5, "N/A" ou None) e atualiza a contagem de válidas."""
+        novo = self.codificar(resposta)
+        antigo = self.codigos[posicao]
+        self.codigos[posicao] = novo
+        self.validas += (novo > CODIGO_NA) - (antigo > CODIGO_NA)
+
+    def resposta(self, posicao):
+        codigo = self.codigos[posicao]
+        if codigo == NAO_RESPONDIDO:
+            return None
+        return "N/A" if codigo == CODIGO_NA else codigo
+
+    def indice_opcao(self, posicao):
+        """Índice da opção no rádio ["N/A", 1, 2, 3, 4, 5]; não respondido aparece como N/A."""
+        return max(self.codigos[posicao], 0)
+
+    def como_dicionario(self, ids):
+        """ID → resposta dos itens respondidos (formato esperado por formato.py e pontuacao.py)."""
+        return {item_id: self.resposta(i) for i, item_id in enumerate(ids) if self.codigos[i] != NAO_RESPONDIDO}
+
+    def para_bytes(self):
+        return self.codigos.tobytes()
+
+    @classmethod
+    def de_bytes(cls, dados, tamanho):
+        codigos = array("b")
+        codigos.frombytes(dados)
+        return cls(tamanho, codigos)
+
+
+def novo_token():
+    return secrets.token_urlsafe(16)
+
+
+def token_valido(token):
+    return bool(token) and bool(_TOKEN_VALIDO.match(token))
+
+
+class ArmazemRascunhos:
+    """Rascunhos por token em SQLite, compartilhado por todas as sessões do processo."""
+
+    def __init__(self, caminho="rascunhos.sqlite3", validade_dias=30):
+        self.validade_s = validade_dias * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rascunhos (
+                token TEXT PRIMARY KEY,
+                instrumento TEXT NOT NULL,
+                versao TEXT NOT NULL,
+                respostas BLOB NOT NULL,
+                respondente TEXT NOT NULL DEFAULT '',
+                atualizado_em REAL NOT NULL
+            )"""
+        )
+        self.limpar_expirados()
+
+    def salvar(self, token, instrumento, vetor, respondente=""):
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO rascunhos (token, instrumento, versao, respostas, respondente, atualizado_em)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (token) DO UPDATE SET
+                       instrumento = excluded.instrumento, versao = excluded.versao,
+                       respostas = excluded.respostas, respondente = excluded.respondente,
+                       atualizado_em = excluded.atualizado_em""",
+                (token, instrumento.nome, instrumento.versao, vetor.para_bytes(), respondente or "", time.time()),
+            )
+
+    def carregar(self, token, instrumento):
+        """(VetorRespostas, respondente) do rascunho, ou None se não houver um válido para este instrumento."""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT instrumento, versao, respostas, respondente, atualizado_em FROM rascunhos WHERE token = ?",
+                (token,),
+            ).fetchone()
+        if linha is None:
+            return None
+        nome, versao, dados, respondente, atualizado_em = linha
+        if nome != instrumento.nome or versao != instrumento.versao or time.time() - atualizado_em > self.validade_s:
+            return None
+        try:
+            return VetorRespostas.de_bytes(dados, len(instrumento.itens)), respondente
+        except ValueError:
+            return None
+
+    def remover(self, token):
+        with self._lock:
+            self._conn.execute("DELETE FROM rascunhos WHERE token = ?", (token,))
+
+    def limpar_expirados(self):
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM rascunhos WHERE atualizado_em < ?", (time.time() - self.validade_s,)
+            ).rowcount
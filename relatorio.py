@@ -0,0 +1,196 @@
+# relatorio.py
+"""Relatório individual do respondente: gráficos por bloco em PNG e PDF.
+
+O perfil de um envio (média e cobertura de cada bloco, arredondadas) vira uma
+figura com um gráfico de barras e um radar. A renderização com matplotlib roda
+em um pool de processos, fora da thread do script e sem disputar o GIL do
+servidor. O resultado fica em cache pelo hash do perfil: perfis idênticos e
+downloads repetidos não renderizam de novo, e pedidos simultâneos do mesmo
+perfil compartilham a mesma renderização. A sessão guarda só o perfil; os bytes
+são lidos do cache (`consultar`) a cada exibição.
+
+O relatório não traz nome nem organização do respondente, justamente para que
+o cache possa ser compartilhado entre sessões.
+"""
+import hashlib
+import json
+import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import metricas
+
+FORMATOS_RELATORIO = {"png": "image/png", "pdf": "application/pdf"}
+COR_PRIMARIA = "#70D1C6"
+COR_TEXTO = "#333333"
+
+
+@dataclass(frozen=True)
+class PerfilRelatorio:
+    """Dados que determinam o relatório; pequeno o bastante para ficar na sessão."""
+
+    titulo: str
+    blocos: tuple
+    medias: tuple  # Média por bloco (2 casas), None se o bloco não teve respostas
+    coberturas: tuple  # Fração de itens respondidos por bloco (2 casas)
+
+    def chave(self, formato):
+        conteudo = json.dumps([self.titulo, self.blocos, self.medias, self.coberturas, formato], ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def perfil_de(resultado, esquema, titulo, linha=0):
+    """Perfil de um envio a partir do `ResultadoPontuacao` (ver pontuacao.py)."""
+    medias = tuple(
+        None if math.isnan(m) else round(float(m), 2) for m in resultado.medias_bloco[linha]
+    )
+    coberturas = tuple(round(float(c), 2) for c in resultado.cobertura_bloco[linha])
+    return PerfilRelatorio(titulo, tuple(esquema.blocos), medias, coberturas)
+
+
+def renderizar(perfil, formato="png"):
+    """Desenha a figura do perfil e devolve os bytes no formato pedido. Roda no processo do pool."""
+    import io
+    import textwrap
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rotulos = ["\n".join(textwrap.wrap(bloco, 16)) for bloco in perfil.blocos]
+    valores = [m if m is not None else 0.0 for m in perfil.medias]
+
+    figura = plt.figure(figsize=(11, 5), dpi=120)
+    figura.suptitle(perfil.titulo, color=COR_TEXTO, fontsize=14, fontweight="bold")
+
+    # Barras: média por bloco, com a cobertura ao lado
+    barras = figura.add_subplot(1, 2, 1)
+    posicoes = range(len(rotulos))
+    barras.barh(posicoes, valores, color=COR_PRIMARIA)
+    barras.set_yticks(list(posicoes), rotulos)
+    barras.invert_yaxis()
+    barras.set_xlim(0, 5.6)
+    barras.set_xticks([1, 2, 3, 4, 5])
+    barras.set_xlabel("Média (1–5)")
+    for i, (media, cobertura) in enumerate(zip(perfil.medias, perfil.coberturas)):
+        texto = f"{media:.2f} ({cobertura:.0%} respondido)" if media is not None else "sem respostas"
+        barras.text((media or 0) + 0.05, i, texto, va="center", fontsize=8, color=COR_TEXTO)
+    barras.spines[["top", "right"]].set_visible(False)
+
+    # Radar: o mesmo perfil em forma de polígono
+    radar = figura.add_subplot(1, 2, 2, projection="polar")
+    angulos = [2 * math.pi * i / len(rotulos) for i in range(len(rotulos))]
+    radar.plot(angulos + angulos[:1], valores + valores[:1], color=COR_PRIMARIA, linewidth=2)
+    radar.fill(angulos + angulos[:1], valores + valores[:1], color=COR_PRIMARIA, alpha=0.3)
+    radar.set_xticks(angulos, rotulos, fontsize=8)
+    radar.set_ylim(0, 5)
+    radar.set_yticks([1, 2, 3, 4, 5])
+
+    figura.tight_layout()
+    saida = io.BytesIO()
+    figura.savefig(saida, format=formato)
+    plt.close(figura)
+    return saida.getvalue()
+
+
+def _preparar_processo():
+    """Importa o matplotlib no processo do pool, para o primeiro relatório não pagar por isso."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    return True
+
+
+class GeradorRelatorios:
+    """Pool de processos de renderização com cache LRU por hash do perfil."""
+
+    def __init__(self, max_processos=2, tamanho_cache=256):
+        self.max_processos = max_processos
+        self.tamanho_cache = tamanho_cache
+        self._lock = threading.Lock()
+        self._pool = None
+        self._cache = OrderedDict()  # chave → bytes
+        self._em_andamento = {}  # chave → Future
+        self._falhas = OrderedDict()  # chave → exceção da última renderização que falhou
+
+    def _obter_pool(self):
+        if self._pool is None:
+            # "spawn": o servidor tem várias threads, e fork a partir dele não é seguro
+            self._pool = ProcessPoolExecutor(self.max_processos, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def solicitar(self, perfil, formato="png"):
+        """Future com os bytes do relatório; já resolvido se estiver em cache."""
+        if formato not in FORMATOS_RELATORIO:
+            raise ValueError(f"Formato de relatório desconhecido: {formato!r}")
+        chave = perfil.chave(formato)
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                metricas.incrementar("likert_relatorio_cache_total", resultado="acerto")
+                pronto = Future()
+                pronto.set_result(self._cache[chave])
+                return pronto
+            if chave in self._em_andamento:
+                metricas.incrementar("likert_relatorio_cache_total", resultado="em_andamento")
+                return self._em_andamento[chave]
+            metricas.incrementar("likert_relatorio_cache_total", resultado="falha")
+            self._falhas.pop(chave, None)
+            try:
+                futuro = self._obter_pool().submit(renderizar, perfil, formato)
+            except BrokenProcessPool:
+                self._pool = None  # Um processo morreu: recria o pool
+                futuro = self._obter_pool().submit(renderizar, perfil, formato)
+            self._em_andamento[chave] = futuro
+
+        inicio = time.perf_counter()
+
+        def concluir(f):
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+                if f.cancelled():
+                    return
+                if f.exception() is not None:
+                    self._falhas[chave] = f.exception()
+                    while len(self._falhas) > self.tamanho_cache:
+                        self._falhas.popitem(last=False)
+                    return
+                self._cache[chave] = f.result()
+                while len(self._cache) > self.tamanho_cache:
+                    self._cache.popitem(last=False)
+            metricas.observar("likert_relatorio_segundos", time.perf_counter() - inicio, formato=formato)
+
+        futuro.add_done_callback(concluir)
+        return futuro
+
+    def consultar(self, perfil, formato="png"):
+        """Future de um relatório já pedido, sem contar como novo pedido.
+
+        Resolvido com os bytes do cache ou com o erro da renderização, ou o
+        Future em andamento. Se o perfil já saiu do cache, pede de novo.
+        """
+        chave = perfil.chave(formato)
+        with self._lock:
+            if chave in self._em_andamento:
+                return self._em_andamento[chave]
+            if chave in self._cache or chave in self._falhas:
+                pronto = Future()
+                if chave in self._cache:
+                    self._cache.move_to_end(chave)
+                    pronto.set_result(self._cache[chave])
+                else:
+                    pronto.set_exception(self._falhas[chave])
+                return pronto
+        return self.solicitar(perfil, formato)
+
+    def aquecer(self):
+        """Sobe os processos do pool e carrega o matplotlib neles (usado no aquecimento)."""
+        with self._lock:
+            pool = self._obter_pool()
+        futuros = [pool.submit(_preparar_processo) for _ in range(self.max_processos)]
+        return all(f.result(timeout=120) for f in futuros)
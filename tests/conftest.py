@@ -0,0 +1,6 @@
+# conftest.py
+"""Os módulos do app ficam na raiz do repositório, sem pacote: coloca a raiz no sys.path."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
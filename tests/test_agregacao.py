@@ -0,0 +1,120 @@
+# test_agregacao.py
+"""Agregação incremental: só linhas novas, cursor persistente e TTL."""
+import pytest
+
+import agregacao
+from agregacao import AgregadorIncremental
+from formato import cabecalho_largo, linha_larga, linhas_longas
+from planilha_fake import PlanilhaFake
+
+ITENS = [
+    ("Rede", "RE01", "Item 1", "NÃO"),
+    ("Rede", "RE02", "Item 2", "SIM"),
+    ("Energia", "EN01", "Item 3", "NÃO"),
+]
+
+
+def meta(org):
+    return ["2026-01-01T10:00:00", org, "Fulano", "01/01/2026", "Organização"]
+
+
+def envio_longo(org, respostas):
+    return linhas_longas(meta(org), ITENS, dict(zip(("RE01", "RE02", "EN01"), respostas)))
+
+
+def agregador(planilha, tmp_path, **kwargs):
+    kwargs.setdefault("ttl", 0)
+    return AgregadorIncremental(planilha, ITENS, caminho_cache=str(tmp_path / "agregados.sqlite3"), **kwargs)
+
+
+def test_le_so_as_linhas_novas(tmp_path):
+    planilha = PlanilhaFake()
+    planilha.append_rows(envio_longo("A", [4, 2, 3]))
+    intervalos = []
+    get_values = planilha.get_values
+    planilha.get_values = lambda intervalo: intervalos.append(intervalo) or get_values(intervalo)
+    ag = agregador(planilha, tmp_path, linhas_por_leitura=2)
+
+    assert ag.atualizar() == 3
+    assert intervalos == ["A1:I2", "A3:I4"]
+
+    planilha.append_rows(envio_longo("A", [2, 4, "N/A"]))
+    intervalos.clear()
+    assert ag.atualizar() == 3
+    assert intervalos == ["A4:I5", "A6:I7"]
+
+    # RE01: 4, 2; RE02 (reverso): 6-2=4, 6-4=2; EN01: 3 (N/A fica de fora)
+    assert ag.media("A", "Rede", "RE02") == {"media": 3.0, "n": 2}
+    assert ag.media("A", "Rede") == {"media": 3.0, "n": 4}
+    assert ag.media("A") == {"media": 3.0, "n": 5}
+    assert ag.media("B") == {"media": None, "n": 0}
+    assert ag.organizacoes() == ["A"]
+
+
+def test_cursor_e_somas_persistem_sem_contagem_dupla(tmp_path):
+    planilha = PlanilhaFake()
+    planilha.append_rows(envio_longo("A", [5, 1, 5]))
+    primeiro = agregador(planilha, tmp_path)
+    primeiro.atualizar()
+
+    planilha.append_rows(envio_longo("B", [1, 5, 1]))
+    segundo = agregador(planilha, tmp_path)  # Outro processo, mesmo cache
+    leituras_antes = planilha.chamadas_leitura
+
+    assert segundo.ultima_linha == 3
+    assert segundo.media("A") == {"media": 5.0, "n": 3}
+    assert planilha.chamadas_leitura - leituras_antes == 1  # Só as 3 linhas de B
+    assert segundo.media("B") == {"media": 1.0, "n": 3}
+    assert segundo.estado()["ultima_linha"] == 6
+
+    terceiro = agregador(planilha, tmp_path)
+    terceiro.atualizar()
+    assert terceiro.media("A") == {"media": 5.0, "n": 3}
+    assert terceiro.media("B") == {"media": 1.0, "n": 3}
+
+
+def test_ttl_evita_nova_leitura(tmp_path, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(agregacao.time, "monotonic", lambda: agora[0])
+    planilha = PlanilhaFake()
+    planilha.append_rows(envio_longo("A", [3, 3, 3]))
+    ag = agregador(planilha, tmp_path, ttl=60)
+
+    assert ag.media("A")["n"] == 3
+    leituras = planilha.chamadas_leitura
+    planilha.append_rows(envio_longo("A", [5, 1, 5]))
+
+    agora[0] += 59
+    assert ag.media("A")["n"] == 3
+    assert planilha.chamadas_leitura == leituras
+
+    assert ag.atualizar(forcar=True) == 3
+    agora[0] += 61
+    assert ag.media("A")["n"] == 6
+
+
+def test_formato_largo_pula_versoes_desconhecidas(tmp_path):
+    planilha = PlanilhaFake(titulo="Likert Largo")
+    planilha.append_rows([cabecalho_largo(ITENS)])
+    respostas = {"RE01": 4, "RE02": 2, "EN01": "N/A"}
+    planilha.append_rows([
+        linha_larga(meta("A"), ITENS, respostas, "v1"),
+        linha_larga(meta("A"), ITENS, respostas, "v9"),
+        linha_larga(meta("B"), ITENS, {"RE01": 1}, "v1"),
+    ])
+    ag = agregador(planilha, tmp_path, formato="largo", itens_por_versao={"v1": ITENS})
+
+    assert ag.atualizar() == 3
+    estado = ag.estado()
+    assert estado["linhas_ignoradas"] == 1
+    assert estado["ultima_linha"] == 4  # O cursor passa da linha ignorada
+    assert ag.media("A") == {"media": 4.0, "n": 2}
+    assert ag.media("B", "Rede", "RE01") == {"media": 1.0, "n": 1}
+
+    assert ag.atualizar() == 0
+    assert ag.estado()["linhas_ignoradas"] == 1
+
+
+@pytest.mark.parametrize("formato, inicial", [("longo", 0), ("largo", 1)])
+def test_cursor_inicial(tmp_path, formato, inicial):
+    assert agregador(PlanilhaFake(), tmp_path, formato=formato).ultima_linha == inicial
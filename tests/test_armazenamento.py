@@ -0,0 +1,86 @@
+# test_armazenamento.py
+"""Armazenamento em SQLite e espelho para a planilha."""
+from types import SimpleNamespace
+
+from armazenamento import ArmazenamentoSQLite, EspelhoPlanilha
+from itens import INSTRUMENTO_PADRAO
+from planilha_fake import PlanilhaFake
+
+ITENS = (
+    ("Rede", "RE01", "Item 1", "NÃO"),
+    ("Rede", "RE02", "Item 2", "SIM"),
+    ("Energia", "EN01", "Item 3", "NÃO"),
+)
+PADRAO = SimpleNamespace(nome=INSTRUMENTO_PADRAO, versao="v1", itens=ITENS)
+OUTRO = SimpleNamespace(nome="outro", versao="v3", itens=ITENS[:2])
+
+
+def meta(org):
+    return ("2026-01-01T10:00:00", org, "Fulano", "01/01/2026", "Organização")
+
+
+def espelho_com_abas(armazenamento, formato="longo", **kwargs):
+    abas = {}
+
+    def abrir_aba(instrumento):
+        return abas.setdefault(instrumento, PlanilhaFake(titulo=instrumento))
+
+    kwargs.setdefault("intervalo_minimo", 0)
+    return EspelhoPlanilha(armazenamento, abrir_aba, formato=formato, **kwargs), abas
+
+
+def test_uma_transacao_por_envio(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "r.sqlite3"))
+    comandos = []
+    armazenamento._conn.set_trace_callback(comandos.append)
+
+    armazenamento.registrar_envio(meta("A"), PADRAO, {"RE01": 4, "RE02": "N/A"})
+
+    transacoes = [c for c in comandos if c in ("BEGIN", "COMMIT")]
+    assert transacoes == ["BEGIN", "COMMIT"]
+    assert sum(c.lstrip().startswith("INSERT") for c in comandos) == len(ITENS)
+    assert armazenamento.estatisticas() == {"linhas": 3, "envios": 1}
+    linhas = armazenamento._conn.execute("SELECT item_id, resposta, pontuacao FROM respostas ORDER BY posicao").fetchall()
+    # RE02 N/A e EN01 sem resposta ficam sem pontuação
+    assert [(item_id, pontuacao) for item_id, _, pontuacao in linhas] == [("RE01", 4), ("RE02", None), ("EN01", None)]
+
+
+def test_espelho_avanca_o_cursor_por_aba_e_nao_reenvia(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "r.sqlite3"))
+    for org in ("A", "B", "C"):
+        armazenamento.registrar_envio(meta(org), PADRAO, {"RE01": 5})
+    armazenamento.registrar_envio(meta("D"), OUTRO, {"RE01": 1})
+    espelho, abas = espelho_com_abas(armazenamento, envios_por_lote=2)
+
+    assert espelho.sincronizar() == 4
+    assert abas[INSTRUMENTO_PADRAO].chamadas_append == 2  # Lotes de 2 envios
+    assert len(abas[INSTRUMENTO_PADRAO].linhas) == 9
+    assert len(abas["outro"].linhas) == 2
+    assert armazenamento.cursor_espelho("Likert") == 9
+    assert armazenamento.cursor_espelho("Likert - outro") == 11
+
+    assert espelho.sincronizar() == 0
+    assert abas[INSTRUMENTO_PADRAO].chamadas_append == 2
+
+    armazenamento.registrar_envio(meta("E"), PADRAO, {"RE01": 2})
+    assert espelho.sincronizar() == 1
+    assert [linha[1] for linha in abas[INSTRUMENTO_PADRAO].linhas[-3:]] == ["E"] * 3
+    assert len(abas["outro"].linhas) == 2
+
+
+def test_formato_das_linhas_espelhadas(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "r.sqlite3"))
+    armazenamento.registrar_envio(meta("A"), PADRAO, {"RE01": 4, "RE02": 2, "EN01": "N/A"})
+
+    longo, abas_longas = espelho_com_abas(armazenamento)
+    longo.sincronizar()
+    assert abas_longas[INSTRUMENTO_PADRAO].linhas == [
+        [*meta("A"), "Rede", "Item 1", 4, 4],
+        [*meta("A"), "Rede", "Item 2", 2, 4],
+        [*meta("A"), "Energia", "Item 3", "N/A", "N/A"],
+    ]
+
+    largo, abas_largas = espelho_com_abas(armazenamento, formato="largo")
+    largo.sincronizar()  # Outra aba ("Likert Largo"), outro cursor
+    assert abas_largas[INSTRUMENTO_PADRAO].linhas == [[*meta("A"), "v1", 4, 2, "N/A"]]
+    assert armazenamento.cursor_espelho("Likert Largo") == 3
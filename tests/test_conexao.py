@@ -0,0 +1,105 @@
+# test_conexao.py
+"""Disjuntor e reconexão da ConexaoPlanilha, com o cliente fake (planilha_fake.py)."""
+import pytest
+
+from conexao import ABERTO, FECHADO, MEIO_ABERTO, CircuitoAberto, ConexaoPlanilha, Disjuntor
+from planilha_fake import ClienteFake, erro_api
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_disjuntor_abre_apos_limiar_e_recusa_chamadas():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=3, tempo_abertura=30.0, relogio=relogio)
+    for _ in range(2):
+        disjuntor.permitir()
+        disjuntor.registrar_falha()
+    assert disjuntor.estado == FECHADO
+    disjuntor.permitir()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()
+
+
+def test_disjuntor_meio_aberto_permite_uma_chamada_de_teste():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=1, tempo_abertura=30.0, relogio=relogio)
+    disjuntor.registrar_falha()
+    relogio.agora = 31.0
+    disjuntor.permitir()
+    assert disjuntor.estado == MEIO_ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()  # A chamada de teste ainda não terminou
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == FECHADO
+    assert disjuntor.falhas_seguidas == 0
+
+
+def test_disjuntor_reabre_se_a_chamada_de_teste_falha():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=5, tempo_abertura=30.0, relogio=relogio)
+    for _ in range(5):
+        disjuntor.registrar_falha()
+    relogio.agora = 31.0
+    disjuntor.permitir()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO
+    with pytest.raises(CircuitoAberto):
+        disjuntor.permitir()
+
+
+def test_reconecta_depois_de_token_expirado():
+    abas = {}
+    clientes = []
+
+    def abrir_cliente():
+        clientes.append(ClienteFake(abas=abas))
+        return clientes[-1]
+
+    conexao = ConexaoPlanilha(abrir_cliente)
+    aba = conexao.aba("Likert")
+    aba.append_rows([["primeira"]])
+    clientes[0].expirar_token()
+
+    aba.append_rows([["segunda"]])
+
+    assert len(clientes) == 2
+    assert abas["Likert"].linhas == [["primeira"], ["segunda"]]
+    assert conexao.estado()["reconexoes"] == 1
+    assert conexao.disjuntor.estado == FECHADO
+
+
+def test_falhas_de_rede_abrem_o_circuito_sem_chamar_a_api():
+    cliente = ClienteFake()
+    conexao = ConexaoPlanilha(lambda: cliente, limiar_falhas=2, tempo_abertura=60.0)
+    aba = conexao.aba("Likert")
+    aba.row_values(1)
+    cliente.injetar_falhas(5, "rede")
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            aba.append_rows([["x"]])
+    chamadas = cliente.chamadas
+
+    with pytest.raises(CircuitoAberto):
+        aba.append_rows([["x"]])
+    assert cliente.chamadas == chamadas
+    assert conexao.estado()["circuito"] == ABERTO
+
+
+def test_erro_de_cota_nao_conta_como_indisponibilidade():
+    cliente = ClienteFake()
+    conexao = ConexaoPlanilha(lambda: cliente, limiar_falhas=1)
+    aba = conexao.aba("Likert")
+    aba.row_values(1)
+    cliente._aba("Likert").injetar_429(3)
+    for _ in range(3):
+        with pytest.raises(type(erro_api(429))):
+            aba.append_rows([["x"]])
+    assert conexao.disjuntor.estado == FECHADO
@@ -0,0 +1,118 @@
+# test_exportar.py
+"""Exportação em blocos: leitura por intervalos, retomada e --recomecar."""
+import csv
+import glob
+import os
+
+import pytest
+
+from exportar import ler_estado, exportar
+from formato import CABECALHO_LONGO
+from planilha_fake import PlanilhaFake
+
+
+def linha(n):
+    return [f"2025-01-01 10:00:{n:02d}", "org1", f"Pessoa {n}", "2025-01-01", "Org", "B1", f"Q{n}", str(n % 5 + 1), ""]
+
+
+def planilha_com(n_linhas):
+    planilha = PlanilhaFake()
+    planilha.append_rows([CABECALHO_LONGO])
+    planilha.append_rows([linha(n) for n in range(n_linhas)])
+    return planilha
+
+
+def test_le_em_intervalos_limitados(tmp_path):
+    planilha = planilha_com(25)
+    saida = str(tmp_path / "r.csv")
+
+    resultado = exportar(planilha, saida, "csv", linhas_por_bloco=10)
+
+    assert resultado["linhas_exportadas"] == 25
+    assert resultado["ultima_linha"] == 26
+    assert planilha.chamadas_leitura == 3  # 10 + 10 + 5 linhas
+    with open(saida, newline="", encoding="utf-8") as f:
+        linhas = list(csv.reader(f))
+    assert linhas[0] == CABECALHO_LONGO
+    assert linhas[1:] == [linha(n) for n in range(25)]
+
+
+def test_csv_retoma_de_onde_parou(tmp_path):
+    planilha = planilha_com(5)
+    saida = str(tmp_path / "r.csv")
+    exportar(planilha, saida, "csv", linhas_por_bloco=10)
+    assert ler_estado(saida) == {"ultima_linha": 6, "linhas_exportadas": 5}
+
+    planilha.append_rows([linha(n) for n in range(5, 8)])
+    leituras_antes = planilha.chamadas_leitura
+    resultado = exportar(planilha, saida, "csv", linhas_por_bloco=10)
+
+    assert resultado["linhas_exportadas"] == 3
+    assert planilha.chamadas_leitura - leituras_antes == 1
+    assert ler_estado(saida) == {"ultima_linha": 9, "linhas_exportadas": 8}
+    with open(saida, newline="", encoding="utf-8") as f:
+        linhas = list(csv.reader(f))
+    assert linhas == [CABECALHO_LONGO] + [linha(n) for n in range(8)]  # Cabeçalho uma vez só
+
+    # Nada novo: nenhuma linha exportada e nenhum arquivo gerado
+    assert exportar(planilha, saida, "csv")["arquivo"] is None
+
+
+def test_csv_recomecar_reescreve(tmp_path):
+    planilha = planilha_com(4)
+    saida = str(tmp_path / "r.csv")
+    exportar(planilha, saida, "csv")
+    exportar(planilha, saida, "csv", recomecar=True)
+
+    with open(saida, newline="", encoding="utf-8") as f:
+        assert len(list(csv.reader(f))) == 5
+    assert ler_estado(saida) == {"ultima_linha": 5, "linhas_exportadas": 4}
+
+
+def test_parquet_uma_parte_por_execucao_e_recomecar(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    planilha = planilha_com(12)
+    saida = str(tmp_path / "r_parquet")
+
+    exportar(planilha, saida, "parquet", linhas_por_bloco=5)
+    planilha.append_rows([linha(n) for n in range(12, 15)])
+    exportar(planilha, saida, "parquet", linhas_por_bloco=5)
+
+    partes = sorted(glob.glob(os.path.join(saida, "parte-*.parquet")))
+    assert [os.path.basename(p) for p in partes] == ["parte-000000002.parquet", "parte-000000014.parquet"]
+    df = pd.concat([pd.read_parquet(p) for p in partes], ignore_index=True)
+    assert list(df.columns) == CABECALHO_LONGO
+    assert df.values.tolist() == [linha(n) for n in range(15)]
+
+    exportar(planilha, saida, "parquet", recomecar=True)
+    partes = glob.glob(os.path.join(saida, "parte-*.parquet"))
+    assert [os.path.basename(p) for p in partes] == ["parte-000000002.parquet"]
+    assert len(pd.read_parquet(partes[0])) == 15
+
+
+def test_xlsx_uma_parte_por_execucao_e_recomecar(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    pytest.importorskip("pandas")
+    planilha = planilha_com(6)
+    saida = str(tmp_path / "r.xlsx")
+    outro = tmp_path / "r-extra-000000002.xlsx"
+    outro.write_bytes(b"")  # Não é parte desta exportação: o recomeço não pode apagá-lo
+
+    exportar(planilha, saida, "xlsx")
+    planilha.append_rows([linha(6)])
+    exportar(planilha, saida, "xlsx")
+
+    def partes():
+        return sorted(os.path.basename(p) for p in glob.glob(str(tmp_path / "r-?????????.xlsx")))
+
+    assert partes() == ["r-000000002.xlsx", "r-000000008.xlsx"]
+    aba = openpyxl.load_workbook(tmp_path / "r-000000008.xlsx").active
+    # Células vazias voltam do XLSX como None
+    assert [["" if v is None else v for v in r] for r in aba.iter_rows(values_only=True)] == [CABECALHO_LONGO, linha(6)]
+
+    exportar(planilha, saida, "xlsx", recomecar=True)
+    assert partes() == ["r-000000002.xlsx"]
+    assert outro.exists()
+    aba = openpyxl.load_workbook(tmp_path / "r-000000002.xlsx").active
+    assert aba.max_row == 8
@@ -0,0 +1,118 @@
+# test_fila_envio.py
+"""Fila de envio contra a aba fake: backoff em 429, envios recusados e separação por aba."""
+import time
+
+import fila_envio
+from fila_envio import FilaEnvio
+from planilha_fake import LIMITE_CELULA, PlanilhaFake, erro_api
+
+
+class PlanilhaCronometrada(PlanilhaFake):
+    """Registra o instante de cada chamada a append_rows."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instantes = []
+
+    def append_rows(self, values, **kwargs):
+        self.instantes.append(time.monotonic())
+        return super().append_rows(values, **kwargs)
+
+
+def nova_fila(planilha, tmp_path, **kwargs):
+    kwargs.setdefault("intervalo_minimo", 0.0)
+    return FilaEnvio(planilha, caminho_spool=str(tmp_path / "spool.sqlite3"), iniciar=False, **kwargs)
+
+
+def test_backoff_exponencial_em_erro_429(tmp_path, monkeypatch):
+    monkeypatch.setattr(fila_envio.random, "uniform", lambda a, b: 1.0)  # Sem jitter
+    erro_api(429)  # Importa o gspread antes, para não atrasar a primeira recusa
+    aba = PlanilhaCronometrada()
+    aba.injetar_429(2)
+    fila = nova_fila(aba, tmp_path, backoff_inicial=0.2)
+    fila.enfileirar([["a", 1], ["a", 2]])
+    fila.iniciar()
+    try:
+        assert fila.esvaziar(10)
+    finally:
+        fila.parar(2)
+
+    assert aba.linhas == [["a", 1], ["a", 2]]  # Gravado uma única vez, depois das recusas
+    assert aba.chamadas_append == 3
+    assert fila.estatisticas()["falhas"] == 2
+    primeira, segunda = (b - a for a, b in zip(aba.instantes, aba.instantes[1:]))
+    assert 0.2 <= primeira < 0.35
+    assert segunda >= 0.4  # Dobra a cada falha
+
+
+def test_envio_recusado_vai_para_rejeitados_e_fila_continua(tmp_path):
+    aba = PlanilhaFake()
+    fila = nova_fila(aba, tmp_path)
+    for i in range(6):
+        texto = "x" * (LIMITE_CELULA + 1) if i == 3 else "ok"
+        fila.enfileirar([[i, texto]])
+    fila.iniciar()
+    try:
+        assert fila.esvaziar(10)
+    finally:
+        fila.parar(2)
+
+    assert [linha[0] for linha in aba.linhas] == [0, 1, 2, 4, 5]
+    assert fila.estatisticas()["envios_rejeitados"] == 1
+    assert fila.reenviar_rejeitados() == 1
+    assert fila.estatisticas()["envios_pendentes"] == 1
+
+
+def test_linha_de_comando_lista_e_reenvia_rejeitados(tmp_path, monkeypatch, capsys):
+    aba = PlanilhaFake()
+    fila = nova_fila(aba, tmp_path)
+    fila.enfileirar([[1, "x" * (LIMITE_CELULA + 1)]])
+    fila.iniciar()
+    try:
+        assert fila.esvaziar(10)
+    finally:
+        fila.parar(2)
+    spool = str(tmp_path / "spool.sqlite3")
+
+    monkeypatch.setattr("sys.argv", ["fila_envio.py", "--spool", spool, "--aba", "Likert"])
+    fila_envio.main()
+    saida = capsys.readouterr().out
+    assert "1 envios rejeitados." in saida
+    assert "Likert\t1 linhas" in saida
+    assert fila.estatisticas()["envios_pendentes"] == 0  # Só listou
+
+    monkeypatch.setattr("sys.argv", ["fila_envio.py", "--spool", spool, "--reenviar"])
+    fila_envio.main()
+    assert "1 envios devolvidos à fila." in capsys.readouterr().out
+    assert fila.rejeitados() == []
+    assert fila.estatisticas()["envios_pendentes"] == 1
+
+
+def test_spool_compartilhado_nao_mistura_abas(tmp_path):
+    longa, larga = PlanilhaFake("Likert"), PlanilhaFake("Likert Largo")
+    fila_longa, fila_larga = nova_fila(longa, tmp_path), nova_fila(larga, tmp_path)
+    fila_longa.enfileirar([["longo"]])
+    fila_larga.enfileirar([["largo"]])
+    for fila in (fila_longa, fila_larga):
+        fila.iniciar()
+        try:
+            assert fila.esvaziar(10)
+        finally:
+            fila.parar(2)
+
+    assert longa.linhas == [["longo"]]
+    assert larga.linhas == [["largo"]]
+
+
+def test_pendentes_sobrevivem_a_um_novo_processo(tmp_path):
+    nova_fila(PlanilhaFake(), tmp_path).enfileirar([["pendente"]])
+
+    aba = PlanilhaFake()
+    fila = nova_fila(aba, tmp_path)
+    assert fila.estatisticas()["envios_pendentes"] == 1
+    fila.iniciar()
+    try:
+        assert fila.esvaziar(10)
+    finally:
+        fila.parar(2)
+    assert aba.linhas == [["pendente"]]
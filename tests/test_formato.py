@@ -0,0 +1,48 @@
+# test_formato.py
+"""Conversão entre os formatos largo e longo da aba de respostas."""
+from formato import cabecalho_largo, larga_para_longa, linha_larga, linhas_longas
+from itens import ITENS
+
+META = ["2026-01-01T10:00:00", "ABCD1234", "Fulano", "01/01/2026", "Organização"]
+
+
+def respostas_exemplo():
+    valores = ["N/A", 1, 2, 3, 4, 5]
+    respostas = {item_id: valores[i % len(valores)] for i, (_, item_id, _, _) in enumerate(ITENS)}
+    del respostas[ITENS[-1][1]]  # Item não respondido
+    return respostas
+
+
+def test_larga_para_longa_reproduz_linhas_longas():
+    respostas = respostas_exemplo()
+    larga = linha_larga(META, ITENS, respostas, "v1")
+
+    convertidas = larga_para_longa([larga], {"v1": ITENS}, cabecalho_largo(ITENS))
+
+    assert convertidas == linhas_longas(META, ITENS, respostas)
+
+
+def test_larga_para_longa_localiza_colunas_pelo_cabecalho():
+    respostas = respostas_exemplo()
+    larga = linha_larga(META, ITENS, respostas, "v1")
+    cabecalho = cabecalho_largo(ITENS)
+    n_meta = len(cabecalho) - len(ITENS)
+    # Colunas de itens em ordem inversa na planilha
+    cabecalho_invertido = cabecalho[:n_meta] + cabecalho[n_meta:][::-1]
+    larga_invertida = larga[:n_meta] + larga[n_meta:][::-1]
+
+    convertidas = larga_para_longa([larga_invertida], {"v1": ITENS}, cabecalho_invertido)
+
+    assert convertidas == linhas_longas(META, ITENS, respostas)
+
+
+def test_linhas_que_nao_convertem_sao_puladas_e_contadas():
+    respostas = respostas_exemplo()
+    valida = linha_larga(META, ITENS, respostas, "v1")
+    desconhecida = linha_larga(META, ITENS, respostas, "v9")
+    ignoradas = []
+
+    convertidas = larga_para_longa([valida, desconhecida, valida], {"v1": ITENS}, cabecalho_largo(ITENS), ignoradas)
+
+    assert convertidas == linhas_longas(META, ITENS, respostas) * 2
+    assert [linha for linha, _ in ignoradas] == [desconhecida]
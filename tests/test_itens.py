@@ -0,0 +1,109 @@
+# test_itens.py
+"""Carga dos instrumentos: cache por processo, recompilação e validação."""
+import json
+import os
+
+import pytest
+
+import itens
+
+DEFINICAO = {
+    "nome": "teste",
+    "versao": "v1",
+    "titulo": "Teste",
+    "itens": [
+        {"bloco": "Rede", "id": "RE01", "item": "Item 1"},
+        {"bloco": "Rede", "id": "RE02", "item": "Item 2", "reverso": "SIM"},
+    ],
+}
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    monkeypatch.setattr(itens, "PASTA_INSTRUMENTOS", str(tmp_path))
+    monkeypatch.setattr(itens, "_cache", {})
+    return tmp_path
+
+
+@pytest.fixture
+def compilacoes(monkeypatch):
+    chamadas = []
+    compilar = itens.compilar_instrumento
+
+    def contar(*args, **kwargs):
+        chamadas.append(args)
+        return compilar(*args, **kwargs)
+
+    monkeypatch.setattr(itens, "compilar_instrumento", contar)
+    return chamadas
+
+
+def gravar(pasta, definicao, nome="teste"):
+    caminho = pasta / f"{nome}.json"
+    caminho.write_text(json.dumps(definicao), encoding="utf-8")
+    return caminho
+
+
+def avancar_mtime(caminho):
+    estado = os.stat(caminho)
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+
+
+def test_instrumento_compilado(pasta):
+    gravar(pasta, DEFINICAO)
+
+    instrumento = itens.carregar_instrumento("teste")
+
+    assert instrumento.itens == (("Rede", "RE01", "Item 1", "NÃO"), ("Rede", "RE02", "Item 2", "SIM"))
+    assert instrumento.reverso == (False, True)
+    assert instrumento.posicao["RE02"] == 1
+    assert instrumento.blocos == (("Rede", "RE", (("RE01", "(RE01) Item 1"), ("RE02", "(RE02) Item 2 (R)"))),)
+    assert itens.listar_instrumentos() == ["teste"]
+
+
+def test_mudanca_so_de_mtime_reaproveita_o_instrumento(pasta, compilacoes):
+    caminho = gravar(pasta, DEFINICAO)
+    primeiro = itens.carregar_instrumento("teste")
+
+    assert itens.carregar_instrumento("teste") is primeiro
+    avancar_mtime(caminho)
+    assert itens.carregar_instrumento("teste") is primeiro
+    assert len(compilacoes) == 1
+
+
+def test_mudanca_de_conteudo_recompila(pasta, compilacoes):
+    caminho = gravar(pasta, DEFINICAO)
+    primeiro = itens.carregar_instrumento("teste")
+
+    gravar(pasta, {**DEFINICAO, "versao": "v2"})  # Mesmo tamanho: só mtime e hash mudam
+    avancar_mtime(caminho)
+    segundo = itens.carregar_instrumento("teste")
+
+    assert segundo is not primeiro
+    assert segundo.versao == "v2"
+    assert segundo.hash != primeiro.hash
+    assert len(compilacoes) == 2
+
+
+@pytest.mark.parametrize("item_extra, mensagem", [
+    ({"bloco": "Rede", "id": "RE01", "item": "Repetido"}, "duplicado"),
+    ({"bloco": "Rede", "id": "RE03", "item": "Item 3", "reverso": "sim"}, "reverso"),
+])
+def test_definicao_invalida(pasta, item_extra, mensagem):
+    gravar(pasta, {**DEFINICAO, "itens": DEFINICAO["itens"] + [item_extra]})
+
+    with pytest.raises(ValueError, match=mensagem):
+        itens.carregar_instrumento("teste")
+
+
+@pytest.mark.parametrize("nome", ["../teste", "teste.json", "", "a/b", None])
+def test_nome_invalido_rejeitado(pasta, nome):
+    gravar(pasta, DEFINICAO)
+
+    with pytest.raises(ValueError):
+        itens.carregar_instrumento(nome)
+
+
+def test_instrumento_inexistente(pasta):
+    with pytest.raises(FileNotFoundError):
+        itens.carregar_instrumento("nao_existe")
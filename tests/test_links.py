@@ -0,0 +1,59 @@
+# test_links.py
+"""Geração e verificação dos links assinados."""
+import urllib.parse
+from datetime import datetime
+
+from links import gerar_link, interpretar_validade, verificar
+
+CHAVE = "chave-de-teste"
+AGORA = 1_800_000_000
+
+
+def parametros(url):
+    consulta = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+    return consulta.get("org"), consulta.get("exp"), consulta.get("sig")
+
+
+def test_link_gerado_e_valido():
+    org = "Associação Ação & Cia"
+    url = gerar_link("https://exemplo.app/", org, AGORA + 3600, CHAVE, inst="outro")
+
+    resultado = verificar(*parametros(url), CHAVE, agora=AGORA)
+
+    assert resultado.valido
+    assert resultado.motivo == "valido"
+    assert resultado.organizacao == org
+    assert resultado.expira_em == AGORA + 3600
+    assert "inst=outro" in url
+
+
+def test_link_expira_sem_nova_verificacao_da_assinatura():
+    url = gerar_link("https://exemplo.app/", "Org", AGORA + 10, CHAVE)
+    resultado = verificar(*parametros(url), CHAVE, agora=AGORA)
+
+    assert resultado.na_data(AGORA + 10).motivo == "valido"
+    assert resultado.na_data(AGORA + 11).motivo == "expirado"
+    assert verificar(*parametros(url), CHAVE, agora=AGORA + 11).motivo == "expirado"
+
+
+def test_link_adulterado_ou_com_outra_chave():
+    org, exp, sig = parametros(gerar_link("https://exemplo.app/", "Org", AGORA + 3600, CHAVE))
+
+    assert verificar("Outra Org", exp, sig, CHAVE, agora=AGORA).motivo == "assinatura_invalida"
+    assert verificar(org, str(AGORA + 7200), sig, CHAVE, agora=AGORA).motivo == "assinatura_invalida"
+    assert verificar(org, exp, sig, "outra-chave", agora=AGORA).motivo == "assinatura_invalida"
+    assert verificar(org, exp, "ãé", CHAVE, agora=AGORA).motivo == "assinatura_invalida"
+
+
+def test_parametros_ausentes_e_configuracao():
+    assert verificar(None, None, None, CHAVE).motivo == "acesso_direto"
+    assert verificar(None, None, None, CHAVE).valido
+    assert verificar("Org", None, None, CHAVE).motivo == "parametros_faltando"
+    assert verificar("Org", "1", "abc", None).motivo == "erro_configuracao"
+
+
+def test_interpretar_validade():
+    assert interpretar_validade("1800000000") == 1_800_000_000
+    fim_do_dia = datetime.fromtimestamp(interpretar_validade("2026-12-31"))
+    assert (fim_do_dia.date().isoformat(), fim_do_dia.hour, fim_do_dia.minute) == ("2026-12-31", 23, 59)
+    assert interpretar_validade("2026-12-31T08:30") == int(datetime(2026, 12, 31, 8, 30).timestamp())
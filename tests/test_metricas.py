@@ -0,0 +1,90 @@
+# test_metricas.py
+"""Exportação das métricas no formato de texto do Prometheus."""
+import metricas
+from metricas import Registro
+
+
+def series(texto):
+    """Linhas de amostra (sem comentários) → {série: valor}."""
+    return dict(linha.rsplit(" ", 1) for linha in texto.splitlines() if linha and not linha.startswith("#"))
+
+
+def test_contadores_e_medidores():
+    registro = Registro()
+    registro.descrever("envios_total", "Envios registrados.")
+    registro.incrementar("envios_total", formato="longo")
+    registro.incrementar("envios_total", 2, formato="longo")
+    registro.incrementar("envios_total", formato="largo")
+    registro.definir("pendentes", 7, aba="Likert")
+    registro.definir("pendentes", 3, aba="Likert")
+
+    texto = registro.texto_prometheus()
+
+    assert texto.splitlines()[:2] == ["# HELP envios_total Envios registrados.", "# TYPE envios_total counter"]
+    assert texto.count("# TYPE envios_total") == 1
+    assert "# TYPE pendentes gauge" in texto
+    assert "# HELP pendentes" not in texto
+    assert series(texto) == {
+        'envios_total{formato="largo"}': "1",
+        'envios_total{formato="longo"}': "3",
+        'pendentes{aba="Likert"}': "3",
+    }
+
+
+def test_histograma_com_buckets_acumulados():
+    registro = Registro()
+    for valor in (0.5, 2, 2, 7, 100):
+        registro.observar("latencia", valor, limites=(1, 2, 5))
+
+    texto = registro.texto_prometheus()
+
+    assert "# TYPE latencia histogram" in texto
+    assert series(texto) == {
+        'latencia_bucket{le="1"}': "1",
+        'latencia_bucket{le="2"}': "3",  # O limite é inclusivo
+        'latencia_bucket{le="5"}': "3",
+        'latencia_bucket{le="+Inf"}': "5",
+        "latencia_sum": "111.5",
+        "latencia_count": "5",
+    }
+
+
+def test_histograma_com_rotulos():
+    registro = Registro()
+    registro.observar("relatorio", 0.2, limites=(1,), formato="pdf")
+
+    assert series(registro.texto_prometheus()) == {
+        'relatorio_bucket{formato="pdf",le="1"}': "1",
+        'relatorio_bucket{formato="pdf",le="+Inf"}': "1",
+        'relatorio_sum{formato="pdf"}': "0.2",
+        'relatorio_count{formato="pdf"}': "1",
+    }
+
+
+def test_rotulos_escapados_e_mistos():
+    registro = Registro()
+    registro.incrementar("erros_total", erro='aspas " barra \\ e\nquebra')
+    registro.incrementar("erros_total", status=429)
+    registro.incrementar("erros_total", status="ConnectionError")
+
+    linhas = series(registro.texto_prometheus())
+
+    assert linhas['erros_total{erro="aspas \\" barra \\\\ e\\nquebra"}'] == "1"
+    assert linhas['erros_total{status="429"}'] == "1"
+    assert linhas['erros_total{status="ConnectionError"}'] == "1"
+
+
+def test_coletor_atualiza_medidores_antes_da_exportacao():
+    registro = Registro()
+    tamanho = [4]
+    registro.registrar_coletor(lambda r: r.definir("fila", tamanho[0]))
+
+    assert series(registro.texto_prometheus()) == {"fila": "4"}
+    tamanho[0] = 0
+    assert series(registro.texto_prometheus()) == {"fila": "0"}
+
+
+def test_metricas_do_app_tem_descricao():
+    metricas.REGISTRO.incrementar("likert_reruns_total")
+
+    assert "# HELP likert_reruns_total Execuções do script do app." in metricas.texto_prometheus()
@@ -0,0 +1,72 @@
+# test_pontuacao.py
+"""Motor de pontuação: reversos, respostas inválidas, médias e cobertura por bloco."""
+import numpy as np
+import pytest
+
+from pontuacao import esquema_de, pontuacao_para_planilha, pontuar, pontuar_matriz
+
+ITENS = [
+    ("Rede", "RE01", "Item 1", "NÃO"),
+    ("Rede", "RE02", "Item 2", "SIM"),
+    ("Rede", "RE03", "Item 3", "NÃO"),
+    ("Energia", "EN01", "Item 4", "SIM"),
+    ("Energia", "EN02", "Item 5", "NÃO"),
+]
+
+
+@pytest.fixture
+def esquema():
+    return esquema_de(ITENS)
+
+
+def test_itens_reversos_recebem_seis_menos_a_resposta(esquema):
+    resultado = pontuar_matriz([[1, 1, 1, 1, 1], [5, 5, 5, 5, 5], [2, 4, 3, 2, 3]], esquema)
+
+    np.testing.assert_array_equal(
+        resultado.pontuacoes,
+        [[1, 5, 1, 5, 1], [5, 1, 5, 1, 5], [2, 2, 3, 4, 3]],
+    )
+
+
+def test_respostas_invalidas_viram_nan(esquema):
+    resultado = pontuar_matriz([["N/A", None, "", "7", "0"]], esquema)
+
+    assert np.isnan(resultado.pontuacoes).all()
+    assert resultado.validas[0] == 0
+    assert np.isnan(resultado.medias_bloco).all()
+    assert np.isnan(resultado.media_geral[0])
+    np.testing.assert_array_equal(resultado.cobertura_bloco, [[0.0, 0.0]])
+    assert pontuacao_para_planilha(resultado.pontuacoes[0, 0]) == "N/A"
+
+
+def test_medias_e_cobertura_por_bloco(esquema):
+    # Rede: 4, (6-2)=4, N/A → média 4, cobertura 2/3; Energia: (6-1)=5, 3 → média 4, cobertura 1
+    resultado = pontuar({"RE01": 4, "RE02": 2, "RE03": "N/A", "EN01": 1, "EN02": 3}, esquema)
+
+    assert esquema.blocos == ("Rede", "Energia")
+    np.testing.assert_allclose(resultado.medias_bloco, [[4.0, 4.0]])
+    np.testing.assert_allclose(resultado.cobertura_bloco, [[2 / 3, 1.0]])
+    assert resultado.media_geral[0] == pytest.approx(16 / 4)
+    assert resultado.cobertura_geral[0] == pytest.approx(4 / 5)
+    assert resultado.validas[0] == 4
+    assert [pontuacao_para_planilha(v) for v in resultado.pontuacoes[0]] == [4, 4, "N/A", 5, 3]
+
+
+def test_matriz_de_texto_e_numerica_dao_o_mesmo_resultado(esquema):
+    numerica = np.array([[1, 2, 3, 4, 5], [5, 4, np.nan, 2, 1], [3, np.nan, np.nan, np.nan, 3]])
+    texto = [["1", "2", "3", "4", "5"], ["5", "4", "N/A", "2", "1"], ["3", "", None, "N/A", "3"]]
+
+    a = pontuar_matriz(numerica, esquema)
+    b = pontuar_matriz(texto, esquema)
+
+    for campo in ("pontuacoes", "medias_bloco", "cobertura_bloco", "media_geral", "cobertura_geral", "validas"):
+        np.testing.assert_array_equal(getattr(a, campo), getattr(b, campo), err_msg=campo)
+
+
+def test_numero_de_colunas_errado(esquema):
+    with pytest.raises(ValueError):
+        pontuar_matriz([[1, 2, 3]], esquema)
+
+
+def test_esquema_reaproveitado(esquema):
+    assert esquema_de([list(item) for item in ITENS]) is esquema
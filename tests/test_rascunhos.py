@@ -0,0 +1,99 @@
+# test_rascunhos.py
+"""Vetor de respostas compacto e rascunhos em SQLite."""
+from types import SimpleNamespace
+
+import pytest
+
+import rascunhos
+from rascunhos import ArmazemRascunhos, VetorRespostas, novo_token, token_valido
+
+
+def instrumento(nome="padrao", versao="v1", n_itens=4):
+    return SimpleNamespace(nome=nome, versao=versao, itens=[{"id": f"Q{i}"} for i in range(n_itens)])
+
+
+def test_validas_acompanha_cada_mudanca():
+    vetor = VetorRespostas(4)
+    assert vetor.validas == 0
+
+    vetor.definir(0, 3)
+    vetor.definir(1, "N/A")
+    assert vetor.validas == 1
+
+    vetor.definir(1, 5)  # N/A → válida
+    vetor.definir(0, 2)  # válida → válida
+    assert vetor.validas == 2
+
+    vetor.definir(0, "N/A")
+    vetor.definir(1, None)
+    assert vetor.validas == 0
+    assert [vetor.resposta(i) for i in range(4)] == ["N/A", None, None, None]
+
+
+def test_bytes_ida_e_volta():
+    vetor = VetorRespostas(4)
+    for posicao, resposta in enumerate([5, "N/A", None, 1]):
+        vetor.definir(posicao, resposta)
+
+    copia = VetorRespostas.de_bytes(vetor.para_bytes(), 4)
+
+    assert len(vetor.para_bytes()) == 4
+    assert copia.validas == 2
+    assert copia.como_dicionario(["a", "b", "c", "d"]) == {"a": 5, "b": "N/A", "d": 1}
+    assert [copia.indice_opcao(i) for i in range(4)] == [5, 0, 0, 1]
+    with pytest.raises(ValueError):
+        VetorRespostas.de_bytes(vetor.para_bytes(), 5)
+
+
+def test_tokens():
+    assert token_valido(novo_token())
+    assert not token_valido("")
+    assert not token_valido("curto")
+    assert not token_valido("x" * 20 + "'; --")
+
+
+def test_rascunho_salvo_e_carregado(tmp_path):
+    armazem = ArmazemRascunhos(str(tmp_path / "r.sqlite3"))
+    vetor = VetorRespostas(4)
+    vetor.definir(2, 4)
+
+    armazem.salvar("t" * 22, instrumento(), vetor, respondente="Ana")
+    recuperado, respondente = armazem.carregar("t" * 22, instrumento())
+
+    assert respondente == "Ana"
+    assert recuperado.para_bytes() == vetor.para_bytes()
+    assert armazem.carregar("u" * 22, instrumento()) is None
+
+
+def test_rascunho_de_outra_versao_ou_instrumento_e_descartado(tmp_path):
+    armazem = ArmazemRascunhos(str(tmp_path / "r.sqlite3"))
+    armazem.salvar("t" * 22, instrumento(versao="v1"), VetorRespostas(4))
+
+    assert armazem.carregar("t" * 22, instrumento(versao="v2")) is None
+    assert armazem.carregar("t" * 22, instrumento(nome="outro")) is None
+    # Mesma versão declarada, mas com outro número de itens: as posições não batem
+    assert armazem.carregar("t" * 22, instrumento(n_itens=5)) is None
+
+
+def test_rascunho_expirado(tmp_path, monkeypatch):
+    agora = [1_000_000.0]
+    monkeypatch.setattr(rascunhos.time, "time", lambda: agora[0])
+    armazem = ArmazemRascunhos(str(tmp_path / "r.sqlite3"), validade_dias=1)
+    armazem.salvar("t" * 22, instrumento(), VetorRespostas(4))
+
+    agora[0] += 86400
+    assert armazem.carregar("t" * 22, instrumento()) is not None
+
+    agora[0] += 1
+    assert armazem.carregar("t" * 22, instrumento()) is None
+    assert armazem.limpar_expirados() == 1
+
+
+def test_rascunho_removido(tmp_path):
+    armazem = ArmazemRascunhos(str(tmp_path / "r.sqlite3"))
+    armazem.salvar("t" * 22, instrumento(), VetorRespostas(4))
+
+    armazem.remover("t" * 22)
+    armazem.remover("t" * 22)  # Remover de novo não é erro
+
+    assert armazem.carregar("t" * 22, instrumento()) is None
@@ -0,0 +1,81 @@
+# test_relatorio.py
+"""Cache e compartilhamento de renderizações do gerador de relatórios."""
+from concurrent.futures import Future
+
+import pytest
+
+from relatorio import GeradorRelatorios, PerfilRelatorio
+
+PERFIL = PerfilRelatorio("Teste", ("Rede", "Energia"), (4.0, None), (1.0, 0.0))
+
+
+class PoolFake:
+    """Registra os pedidos; quem testa resolve os Futures quando quiser."""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def submit(self, funcao, perfil, formato):
+        futuro = Future()
+        self.pedidos.append((perfil, formato, futuro))
+        return futuro
+
+
+@pytest.fixture
+def gerador():
+    gerador = GeradorRelatorios()
+    gerador._pool = PoolFake()
+    return gerador
+
+
+def test_pedidos_simultaneos_compartilham_a_renderizacao(gerador):
+    primeiro = gerador.solicitar(PERFIL, "png")
+    segundo = gerador.solicitar(PerfilRelatorio("Teste", ("Rede", "Energia"), (4.0, None), (1.0, 0.0)), "png")  # Outra sessão
+    pdf = gerador.solicitar(PERFIL, "pdf")
+
+    assert segundo is primeiro
+    assert pdf is not primeiro
+    assert [formato for _, formato, _ in gerador._pool.pedidos] == ["png", "pdf"]
+    assert gerador.consultar(PERFIL, "png") is primeiro
+
+
+def test_acerto_de_cache_nao_renderiza_de_novo(gerador):
+    gerador.solicitar(PERFIL, "png")
+    gerador._pool.pedidos[0][2].set_result(b"png")
+
+    repetido = gerador.solicitar(PERFIL, "png")
+    consultado = gerador.consultar(PERFIL, "png")
+
+    assert repetido.done() and repetido.result() == b"png"
+    assert consultado.result() == b"png"
+    assert len(gerador._pool.pedidos) == 1
+
+
+def test_consultar_pede_de_novo_o_que_saiu_do_cache(gerador):
+    gerador.tamanho_cache = 1
+    gerador.solicitar(PERFIL, "png")
+    gerador.solicitar(PERFIL, "pdf")
+    for _, formato, futuro in gerador._pool.pedidos:
+        futuro.set_result(formato.encode())
+
+    assert gerador.consultar(PERFIL, "pdf").result() == b"pdf"
+    assert not gerador.consultar(PERFIL, "png").done()  # Descartado pelo LRU: nova renderização
+    assert len(gerador._pool.pedidos) == 3
+
+
+def test_falha_fica_registrada_ate_novo_pedido(gerador):
+    gerador.solicitar(PERFIL, "png")
+    gerador._pool.pedidos[0][2].set_exception(RuntimeError("falhou"))
+
+    with pytest.raises(RuntimeError, match="falhou"):
+        gerador.consultar(PERFIL, "png").result()
+    assert len(gerador._pool.pedidos) == 1
+
+    novo = gerador.solicitar(PERFIL, "png")  # Pedido explícito tenta de novo
+    assert not novo.done()
+    assert len(gerador._pool.pedidos) == 2
+
+
+def test_formato_desconhecido(gerador):
+    with pytest.raises(ValueError):
+        gerador.solicitar(PERFIL, "svg")